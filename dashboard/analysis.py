@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+import scipy.interpolate as interp
+from scipy import sparse
+from sklearn.linear_model import enet_path
+
+# Pure numpy/pandas computations behind the dashboard's cached helpers in app.py
+
+METRICS = ["Views", "Likes", "Comments", "Reposts", "Duration"]
+
+def category_design_matrices(data, sample_size=1000, random_state=None):
+    # Sampled keyword design matrices per category, built once and shared by every model fit
+    matrices = {}
+    for category, category_data in data.groupby('Category', observed=True):
+        category_data = category_data.sample(min(sample_size, len(category_data)), random_state=random_state)
+
+        # Ensure numeric data types
+        category_data['Views'] = pd.to_numeric(category_data['Views'], errors='coerce')
+        category_data['Duration'] = pd.to_numeric(category_data['Duration'], errors='coerce')
+
+        # Remove any rows with NA values
+        category_data = category_data.dropna(subset=['Views', 'Duration'])
+
+        # One-hot profile indicator straight from the categorical codes (one nonzero per row),
+        # with a column only for the profiles observed in this category's sample
+        profiles = category_data['Profile'].cat.remove_unused_categories()
+        profile_dummies = sparse.csr_matrix(
+            (np.ones(len(category_data)), profiles.cat.codes.to_numpy(), np.arange(len(category_data) + 1)),
+            shape=(len(category_data), len(profiles.cat.categories))
+        )
+
+        # Build the keyword indicator matrix in one pass, numbering keywords as they appear
+        vocabulary = {}
+        indices, indptr = [], [0]
+        for keywords in category_data['Keywords']:
+            if isinstance(keywords, (list, tuple, np.ndarray)):  # Videos without keywords get an empty row
+                indices.extend({vocabulary.setdefault(keyword, len(vocabulary)) for keyword in keywords})
+            indptr.append(len(indices))
+        keywords_dummies = sparse.csr_matrix(
+            (np.ones(len(indices)), np.asarray(indices, dtype=np.int64), indptr),
+            shape=(len(category_data), len(vocabulary))
+        )
+
+        # Combine features column-major in float64, which coordinate descent walks without copying
+        X = sparse.hstack(
+            [category_data[['Duration']].to_numpy(dtype=float), profile_dummies, keywords_dummies],
+            format='csc',
+            dtype=np.float64
+        )
+
+        matrices[category] = (X, category_data['Views'].to_numpy(dtype=float), np.array(list(vocabulary), dtype=object))
+
+    return matrices
+
+def keyword_model(X, y, classes):
+    # Elastic-net impact of each keyword on views, controlling for duration and profile
+    no_impact = pd.DataFrame({'Keyword': classes, 'Impact': np.zeros(len(classes))})
+    if len(classes) == 0 or len(y) == 0:
+        return no_impact
+
+    # Center views; the profile dummies stand in for the intercept
+    y = y - y.mean()
+
+    # Fit one warm-started path from the smallest alpha that zeroes every coefficient downwards
+    l1_ratio = 0.5
+    alpha_max = np.abs(X.T @ y).max() / (X.shape[0] * l1_ratio)
+    if alpha_max == 0:  # Views don't vary, so there is nothing to explain
+        return no_impact
+    alphas = np.logspace(np.log10(alpha_max), np.log10(alpha_max * 1e-3), 20)
+    _, coefs, _ = enet_path(X, y, l1_ratio = l1_ratio, alphas = alphas, precompute = False, max_iter = 10000)
+
+    # Keep the strongest regularization that still leaves enough keywords to rank
+    keyword_coefs = coefs[X.shape[1] - len(classes) :]
+    enough = np.flatnonzero(np.count_nonzero(keyword_coefs, axis = 0) >= 50)
+    best = enough[0] if len(enough) else len(alphas) - 1
+
+    # Get feature importance
+    return pd.DataFrame({
+        'Keyword': classes,
+        'Impact': keyword_coefs[:, best]
+    })
+
+def loglog_spline(data, x_metric, y_metric, n_bins=60):
+    # Smoothed trend of y against x on log-log axes, or None with too few distinct points to fit
+    x = data[x_metric].to_numpy(dtype=float, na_value=np.nan)
+    y = data[y_metric].to_numpy(dtype=float, na_value=np.nan)
+    valid = (x > 0) & (y > 0)  # Remove zeros, negatives and missing values
+    x_log = np.log10(x[valid])
+    y = y[valid]
+    if len(x_log) == 0 or x_log.min() == x_log.max():
+        return None
+
+    # Average y within log-spaced bins of x so the spline fits a few stable points
+    edges = np.linspace(x_log.min(), x_log.max(), n_bins + 1)
+    idx = np.clip(np.digitize(x_log, edges) - 1, 0, n_bins - 1)
+    counts = np.bincount(idx, minlength=n_bins)
+    filled = counts > 0
+    x_mean = np.bincount(idx, weights=x_log, minlength=n_bins)[filled] / counts[filled]
+    y_mean = np.bincount(idx, weights=y, minlength=n_bins)[filled] / counts[filled]
+
+    # A cubic spline needs more points than its degree
+    if len(x_mean) < 4:
+        return None
+
+    # Fit spline with higher smoothing factor
+    spl = interp.UnivariateSpline(
+        x_mean,
+        np.log10(y_mean),
+        s=len(x_mean)  # 1.0 times the number of binned points
+    )
+
+    # Generate points for smooth curve
+    x_smooth = np.logspace(x_log.min(), x_log.max(), 100)
+    y_smooth = 10 ** spl(np.log10(x_smooth))
+
+    return x_smooth, y_smooth
+
+def metric_ratios(data):
+    # Per-video ratio for every ordered pair of metrics, NaN where the denominator is zero
+    # Returned alongside the upload dates so the plot's x and y always come from the same frame
+    values = {metric: data[metric].to_numpy(dtype=np.float32, na_value=np.nan) for metric in METRICS}
+
+    ratios = {'Upload Date': data['Upload Date'].to_numpy()}
+    for a in METRICS:
+        for b in METRICS:
+            if a != b:
+                ratios[f"{a}/{b}"] = np.divide(
+                    values[a],
+                    values[b],
+                    out=np.full(len(data), np.nan, dtype=np.float32),
+                    where=values[b] != 0
+                )
+
+    return pd.DataFrame(ratios, index=data.index)
+
+def log_densities_by(data, group_column, metric, n_points=100):
+    # Density curves of log10(metric) for every language/category at once, on a shared grid
+    data = data.loc[data[metric] > 0, [group_column, metric]].dropna()  # Log scale needs positive values
+    if data.empty:
+        return {}
+    codes, groups = pd.factorize(data[group_column], sort=True)
+    log_values = np.log10(data[metric].to_numpy(dtype=float))
+
+    # Histogram every group in one pass; widen a zero-width range so the bins have a width
+    lo, hi = log_values.min(), log_values.max()
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+    edges = np.linspace(lo, hi, n_points + 1)
+    bins = np.clip(np.digitize(log_values, edges) - 1, 0, n_points - 1)
+    hist = np.bincount(codes * n_points + bins, minlength=len(groups) * n_points).reshape(len(groups), n_points)
+    counts = hist.sum(axis=1)
+    present = np.maximum(counts, 1)  # Groups without positive values are dropped below; avoid dividing by zero
+
+    # Scott's rule bandwidth for each group (the gaussian_kde default)
+    sums = np.bincount(codes, weights=log_values, minlength=len(groups))
+    squares = np.bincount(codes, weights=log_values ** 2, minlength=len(groups))
+    variance = np.maximum(squares - sums ** 2 / present, 0) / np.maximum(counts - 1, 1)
+    bandwidth = np.sqrt(variance) * present ** (-1 / 5)
+    bandwidth = np.where(bandwidth > 0, bandwidth, edges[1] - edges[0])
+
+    # Smooth every group's histogram with its own Gaussian kernel in one broadcast product
+    centers = (edges[:-1] + edges[1:]) / 2
+    scaled = (centers[None, :, None] - centers[None, None, :]) / bandwidth[:, None, None]
+    kernels = np.exp(-0.5 * scaled ** 2) / (np.sqrt(2 * np.pi) * bandwidth[:, None, None])
+    density = np.einsum('gij,gj->gi', kernels, hist) / present[:, None]
+
+    # Only plot groups with enough data points (at least 4)
+    return {
+        group: (10 ** centers, density[i])
+        for i, group in enumerate(groups)
+        if counts[i] > 3
+    }
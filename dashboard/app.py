@@ -1,233 +1,597 @@
+import ast
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import boto3
+from botocore.config import Config
 import awswrangler as wr
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
-import scipy.interpolate as interp
-import scipy.stats
-from scipy import sparse
-from sklearn.preprocessing import MultiLabelBinarizer
-from sklearn.linear_model import ElasticNetCV
 from plotly.subplots import make_subplots
 
+import analysis
+
 # Set up AWS credentials from secrets
 aws_credentials = st.secrets["aws_credentials"]
 
-# Create AWS session with role assumption
-session = boto3.Session(
-    aws_access_key_id = aws_credentials["aws_access_key_id"],
-    aws_secret_access_key = aws_credentials["aws_secret_access_key"],
-    region_name = aws_credentials["region"]
-)
-
-# Create STS client to assume role
-sts_client = session.client('sts')
-assumed_role_object = sts_client.assume_role(
-    RoleArn = aws_credentials["role_arn"],
-    RoleSessionName = "StreamlitSession"
-)
+@st.cache_resource(ttl = 3000, show_spinner = False)  # Refresh before the one-hour assumed-role credentials expire
+def get_role_session():
+    # Create AWS session with role assumption
+    session = boto3.Session(
+        aws_access_key_id = aws_credentials["aws_access_key_id"],
+        aws_secret_access_key = aws_credentials["aws_secret_access_key"],
+        region_name = aws_credentials["region"]
+    )
+    
+    # Create STS client to assume role
+    sts_client = session.client('sts')
+    assumed_role_object = sts_client.assume_role(
+        RoleArn = aws_credentials["role_arn"],
+        RoleSessionName = "StreamlitSession"
+    )
+    
+    # Create session with temporary credentials
+    return boto3.Session(
+        aws_access_key_id=assumed_role_object['Credentials']['AccessKeyId'],
+        aws_secret_access_key=assumed_role_object['Credentials']['SecretAccessKey'],
+        aws_session_token=assumed_role_object['Credentials']['SessionToken'],
+        region_name=aws_credentials["region"]
+    )
 
-# Create session with temporary credentials
-role_session = boto3.Session(
-    aws_access_key_id=assumed_role_object['Credentials']['AccessKeyId'],
-    aws_secret_access_key=assumed_role_object['Credentials']['SecretAccessKey'],
-    aws_session_token=assumed_role_object['Credentials']['SessionToken'],
-    region_name=aws_credentials["region"]
-)
+role_session = get_role_session()
 
 # Update wrangler config to use role session
 wr.config.boto3_session = role_session
 
+# Wrangler downloads result files on several threads; give them enough pooled connections
+wr.config.botocore_config = Config(
+    max_pool_connections = 32,
+    tcp_keepalive = True,
+    retries = {'max_attempts': 10, 'mode': 'adaptive'}
+)
+
+# Reuse results of identical queries run within this window instead of rescanning S3
+# Capped at the loaders' one-hour ttl so a reload never gets results older than the frame it replaces
+ATHENA_RESULT_REUSE_SECONDS = min(int(os.environ.get("ATHENA_RESULT_REUSE_MINUTES", "60")), 60) * 60
+
+def run_query(sql, **kwargs):
+    return wr.athena.read_sql_query(
+        sql = sql,
+        database = "tiktok_analytics",
+        boto3_session = role_session,
+        # Results are written as a temporary Parquet table; Snappy decodes faster than Athena's default GZIP
+        ctas_approach = True,
+        ctas_parameters = {"compression": "SNAPPY"},
+        s3_output = "s3://tiktoktrends/athena-results/",
+        athena_cache_settings = {"max_cache_seconds": ATHENA_RESULT_REUSE_SECONDS},
+        **kwargs
+    )
+
 st.set_page_config(
     page_title = "TikTok Trends",
     layout = "wide",
     initial_sidebar_state = "collapsed"
 )
 
-@st.cache_data
+# Live per-profile aggregates over metadata, used when no recent profile_stats snapshot exists
+PROFILE_STATS_SQL = """
+    SELECT
+        profile,
+        COUNT(id) as videos_detected,
+        COALESCE(MAX(text_counts.videos_analyzed), 0) as videos_analyzed,
+        
+        CAST(SUM(duration) as BIGINT) as total_duration,
+        CAST(SUM(view_count) as BIGINT) as total_views,
+        CAST(SUM(like_count) as BIGINT) as total_likes,
+        CAST(SUM(comment_count) as BIGINT) as total_comments,
+        CAST(SUM(repost_count) as BIGINT) as total_reposts,
+        
+        CAST(AVG(duration) as DOUBLE) as average_duration,
+        CAST(AVG(view_count) as DOUBLE) as average_views,
+        CAST(AVG(like_count) as DOUBLE) as average_likes,
+        CAST(AVG(comment_count) as DOUBLE) as average_comments,
+        CAST(AVG(repost_count) as DOUBLE) as average_reposts,
+        
+        CAST(MIN(duration) as BIGINT) as minimum_duration,
+        CAST(MIN(view_count) as BIGINT) as minimum_views,
+        CAST(MIN(like_count) as BIGINT) as minimum_likes,
+        CAST(MIN(comment_count) as BIGINT) as minimum_comments,
+        CAST(MIN(repost_count) as BIGINT) as minimum_reposts,
+        
+        CAST(MAX(duration) as BIGINT) as maximum_duration,
+        CAST(MAX(view_count) as BIGINT) as maximum_views,
+        CAST(MAX(like_count) as BIGINT) as maximum_likes,
+        CAST(MAX(comment_count) as BIGINT) as maximum_comments,
+        CAST(MAX(repost_count) as BIGINT) as maximum_reposts
+    FROM metadata
+    LEFT JOIN (
+        SELECT
+            profile,
+            COUNT(*) as videos_analyzed
+        FROM text_analysis
+        GROUP BY profile
+    ) text_counts USING (profile)
+    GROUP BY profile
+"""
+
+# Snapshots older than this are treated as missing and the live aggregate is used instead
+# Nothing in the pipeline runs scripts/build_profile_stats.py: run it after each ingest (or schedule it,
+# e.g. daily from cron) or every load after this window falls back to the full metadata scan
+PROFILE_STATS_MAX_AGE = pd.Timedelta(hours = int(os.environ.get("PROFILE_STATS_MAX_AGE_HOURS", "24")))
+
+# Shared read-only across sessions; callers must not modify the result in place
+@st.cache_resource(ttl = 3600)
 def get_profile_stats():
-    data = wr.athena.read_sql_query(
-        sql = """
-            SELECT
-                profile as "profile",
-                COUNT(id) as "videos detected",
-                
-                CAST(SUM(duration) as BIGINT) as "total duration",
-                CAST(SUM(view_count) as BIGINT) as "total views",
-                CAST(SUM(like_count) as BIGINT) as "total likes",
-                CAST(SUM(comment_count) as BIGINT) as "total comments",
-                CAST(SUM(repost_count) as BIGINT) as "total reposts",
-                
-                CAST(AVG(duration) as DOUBLE) as "average duration",
-                CAST(AVG(view_count) as DOUBLE) as "average views",
-                CAST(AVG(like_count) as DOUBLE) as "average likes",
-                CAST(AVG(comment_count) as DOUBLE) as "average comments",
-                CAST(AVG(repost_count) as DOUBLE) as "average reposts",
-                
-                CAST(MIN(duration) as BIGINT) as "minimum duration",
-                CAST(MIN(view_count) as BIGINT) as "minimum views",
-                CAST(MIN(like_count) as BIGINT) as "minimum likes",
-                CAST(MIN(comment_count) as BIGINT) as "minimum comments",
-                CAST(MIN(repost_count) as BIGINT) as "minimum reposts",
-                
-                CAST(MAX(duration) as BIGINT) as "maximum duration",
-                CAST(MAX(view_count) as BIGINT) as "maximum views",
-                CAST(MAX(like_count) as BIGINT) as "maximum likes",
-                CAST(MAX(comment_count) as BIGINT) as "maximum comments",
-                CAST(MAX(repost_count) as BIGINT) as "maximum reposts"
-            FROM metadata
-            GROUP BY profile
-        """,
-        database = "tiktok_analytics",
-        boto3_session = role_session
-    )
+    # Prefer the latest snapshot written by scripts/build_profile_stats.py over scanning metadata
+    data = None
+    if wr.catalog.does_table_exist(database = "tiktok_analytics", table = "profile_stats", boto3_session = role_session):
+        data = run_query(
+            """
+                SELECT *
+                FROM profile_stats
+                WHERE snapshot_at = (SELECT MAX(snapshot_at) FROM profile_stats)
+            """,
+            # Arrow-backed columns avoid object dtype for profile names and keep integers nullable
+            dtype_backend = "pyarrow"
+        )
+        
+        # Snapshots are stamped '%Y%m%dT%H%M%S' (UTC); an empty table or unparseable stamp counts as stale
+        snapshot_at = pd.NaT
+        if not data.empty:
+            snapshot_at = pd.to_datetime(data['snapshot_at'].max(), format = '%Y%m%dT%H%M%S', errors = 'coerce', utc = True)
+        if pd.isna(snapshot_at) or pd.Timestamp.now(tz = 'UTC') - snapshot_at > PROFILE_STATS_MAX_AGE:
+            data = None
     
-    quality = data[["profile", "videos detected"]]
-    duration = data[["profile", "total duration", "average duration", "minimum duration", "maximum duration"]]
-    views = data[["profile", "total views", "average views", "minimum views", "maximum views"]]
-    likes = data[["profile", "total likes", "average likes", "minimum likes", "maximum likes"]]
-    comments = data[["profile", "total comments", "average comments", "minimum comments", "maximum comments"]]
-    reposts = data[["profile", "total reposts", "average reposts", "minimum reposts", "maximum reposts"]]
+    # No table yet, or it is empty or stale: aggregate live
+    if data is None:
+        data = run_query(PROFILE_STATS_SQL, dtype_backend = "pyarrow")
     
-    quality.columns = quality.columns.str.title()
-    duration.columns = duration.columns.str.title()
-    views.columns = views.columns.str.title()
-    likes.columns = likes.columns.str.title()
-    comments.columns = comments.columns.str.title()
-    reposts.columns = reposts.columns.str.title()
+    data.columns = data.columns.str.replace("_", " ").str.title()
     
     stats = {
-        "quality": quality,
-        "duration": duration,
-        "views": views,
-        "likes": likes,
-        "comments": comments,
-        "reposts": reposts
+        "quality": data.loc[:, ["Profile", "Videos Detected", "Videos Analyzed"]],
+        "duration": data.loc[:, ["Profile", "Total Duration", "Average Duration", "Minimum Duration", "Maximum Duration"]],
+        "views": data.loc[:, ["Profile", "Total Views", "Average Views", "Minimum Views", "Maximum Views"]],
+        "likes": data.loc[:, ["Profile", "Total Likes", "Average Likes", "Minimum Likes", "Maximum Likes"]],
+        "comments": data.loc[:, ["Profile", "Total Comments", "Average Comments", "Minimum Comments", "Maximum Comments"]],
+        "reposts": data.loc[:, ["Profile", "Total Reposts", "Average Reposts", "Minimum Reposts", "Maximum Reposts"]]
     }
     
     return stats
 
-@st.cache_data
-def get_profile_videos_analyzed():
-    data = wr.athena.read_sql_query(
-        sql = """
-            SELECT
-                profile as "profile",
-                COUNT(*) as "videos analyzed"
-            FROM text_analysis
-            GROUP BY profile
-        """,
-        database = "tiktok_analytics",
-        boto3_session = role_session
-    )
-    
-    data.columns = data.columns.str.title()
-    
-    return data
-
-@st.cache_data
+# Shared read-only across sessions; callers must not modify the result in place
+@st.cache_resource(ttl = 3600)
 def get_all_profiles_data():
-    data = wr.athena.read_sql_query(
-        sql = """
+    data = run_query(
+        """
             SELECT
-                id,
-                metadata.profile as "profile",
+                coalesce(metadata.profile, 'unknown') as "profile",
                 metadata.upload_date as "upload date",
                 metadata.duration as "duration",
                 metadata.view_count as "views",
                 metadata.like_count as "likes",
                 metadata.comment_count as "comments",
                 metadata.repost_count as "reposts",
-                text_analysis.language as "language",
+                coalesce(text_analysis.language, 'unknown') as "language",
                 text_analysis.category as "category",
-                text_analysis.summary as "summary",
                 text_analysis.keywords as "keywords"
             FROM metadata
             INNER JOIN text_analysis USING (id)
-            ORDER BY upload_date
+            WHERE text_analysis.category IS NOT NULL
+                AND lower(text_analysis.category) <> 'unknown'
         """,
-        database = "tiktok_analytics",
-        boto3_session = role_session
+        # Low-cardinality strings are decoded straight into pandas categoricals
+        # (nulls are filled above so every row has a category and a valid code)
+        categories = ["profile", "language"]
     )
     
     data.columns = data.columns.str.title()
     data['Upload Date'] = pd.to_datetime(data['Upload Date'])
-    data = data.rename(columns = {'Id': 'Video ID'})
     
-    # Capitalize category names (handling NA values)
-    data['Category'] = data['Category'].fillna('Unknown').apply(
-        lambda x: '/'.join(word.capitalize() for word in x.split('/'))
+    # Ensure Keywords is a list
+    data['Keywords'] = data['Keywords'].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else x)
+    
+    # Capitalize category names (Unknown/NA categories are filtered out in the query)
+    data['Category'] = format_categories(data['Category'])
+    
+    # Shrink the frame: smallest safe integer widths and dictionary-encoded categories
+    data = data.assign(
+        Category = data['Category'].astype('category'),
+        **{
+            metric: pd.to_numeric(data[metric], downcast='integer')
+            for metric in ["Duration", "Views", "Likes", "Comments", "Reposts"]
+        }
     )
     
-    # Remove Unknown/NA categories
-    data = data[data['Category'] != 'Unknown']
+    # Derived helpers take this as their cache key, so they recompute whenever the frame is reloaded
+    # (they share its one-hour ttl so entries for replaced frames are dropped too)
+    data.attrs['loaded_at'] = time.time()
     
     return data
 
-@st.cache_data
-def keyword_model_for_category(category):
-    # Filter data for category and ensure Keywords is a list
-    data = all_profiles_data[all_profiles_data['Category'] == category].copy()
-    data = data.sample(min(1000, len(data)))
-    data['Keywords'] = data['Keywords'].apply(lambda x: eval(x) if isinstance(x, str) else x)
-    
-    # Ensure numeric data types
-    data['Views'] = pd.to_numeric(data['Views'], errors='coerce')
-    data['Duration'] = pd.to_numeric(data['Duration'], errors='coerce')
-    
-    # Remove any rows with NA values
-    data = data.dropna(subset=['Views', 'Duration'])
-    
-    # Create feature matrices
-    profile_dummies = pd.get_dummies(data['Profile'], dtype=float)
-    
-    # Handle keywords properly
-    mlb = MultiLabelBinarizer(sparse_output=True)
-    keywords_dummies = mlb.fit_transform([kw for kw in data['Keywords']])
-    
-    # Convert to sparse matrices with explicit dtype
-    duration_sparse = sparse.csr_matrix(data[['Duration']].astype(float).values)
-    profile_sparse = sparse.csr_matrix(profile_dummies.values)
-    
-    # Combine features
-    X = sparse.hstack([duration_sparse, profile_sparse, keywords_dummies])
-    y = data['Views'].values
-    
-    # Fit model
-    model = ElasticNetCV(
-        cv = 5,
-        random_state = 0,
-        max_iter = 10000,
-        l1_ratio = [.1, .5, .7, .9, .95, .99, 1]  # Test different L1 ratios
+def format_categories(categories):
+    # Capitalize each part of a category name, e.g. "food/travel" -> "Food/Travel"
+    # Only the distinct names are formatted, then mapped back onto every row
+    formatted = {
+        category: '/'.join(word.capitalize() for word in category.split('/'))
+        for category in categories.unique()
+    }
+    return categories.map(formatted)
+
+@st.cache_data(ttl = 3600)
+def get_daily_metric_averages():
+    # Daily averages over the same analyzed, categorized videos as get_all_profiles_data
+    data = run_query(
+        """
+            SELECT
+                metadata.upload_date as "upload date",
+                AVG(metadata.duration) as "duration",
+                AVG(metadata.view_count) as "views",
+                AVG(metadata.like_count) as "likes",
+                AVG(metadata.comment_count) as "comments",
+                AVG(metadata.repost_count) as "reposts"
+            FROM metadata
+            INNER JOIN text_analysis USING (id)
+            WHERE text_analysis.category IS NOT NULL
+                AND lower(text_analysis.category) <> 'unknown'
+            GROUP BY metadata.upload_date
+        """
     )
-    model.fit(X, y)
     
-    # Get feature importance
-    keyword_importance = pd.DataFrame({
-        'Keyword': mlb.classes_,
-        'Impact': model.coef_[-len(mlb.classes_) :]
-    })
+    data.columns = data.columns.str.title()
+    data['Upload Date'] = pd.to_datetime(data['Upload Date'])
+    
+    return data.set_index('Upload Date').sort_index()
+
+@st.cache_data(ttl = 3600)
+def get_language_daily_averages():
+    data = run_query(
+        """
+            SELECT
+                metadata.upload_date as "upload date",
+                lower(text_analysis.language) as "language",
+                AVG(metadata.duration) as "duration",
+                AVG(metadata.view_count) as "views",
+                AVG(metadata.like_count) as "likes",
+                AVG(metadata.comment_count) as "comments",
+                AVG(metadata.repost_count) as "reposts"
+            FROM metadata
+            INNER JOIN text_analysis USING (id)
+            WHERE text_analysis.category IS NOT NULL
+                AND lower(text_analysis.category) <> 'unknown'
+                AND text_analysis.language IS NOT NULL
+            GROUP BY metadata.upload_date, lower(text_analysis.language)
+        """
+    )
+    
+    data.columns = data.columns.str.title()
+    data['Upload Date'] = pd.to_datetime(data['Upload Date'])
+    data['Language'] = data['Language'].str.title()
+    
+    return data.sort_values('Upload Date')
+
+@st.cache_data(ttl = 3600)
+def get_category_daily_averages():
+    data = run_query(
+        """
+            SELECT
+                metadata.upload_date as "upload date",
+                lower(text_analysis.category) as "category",
+                AVG(metadata.duration) as "duration",
+                AVG(metadata.view_count) as "views",
+                AVG(metadata.like_count) as "likes",
+                AVG(metadata.comment_count) as "comments",
+                AVG(metadata.repost_count) as "reposts"
+            FROM metadata
+            INNER JOIN text_analysis USING (id)
+            WHERE text_analysis.category IS NOT NULL
+                AND lower(text_analysis.category) <> 'unknown'
+            GROUP BY metadata.upload_date, lower(text_analysis.category)
+        """
+    )
+    
+    data.columns = data.columns.str.title()
+    data['Upload Date'] = pd.to_datetime(data['Upload Date'])
+    data['Category'] = format_categories(data['Category'])
     
-    return keyword_importance
+    return data.sort_values('Upload Date')
 
-@st.cache_data
-def top_predictive_keywords_for_category(category):
-    keyword_importances = keyword_model_for_category(category)
-    head = keyword_importances.sort_values(by = 'Impact', key = abs, ascending = False).head(10)
+@st.cache_data(ttl = 3600)
+def get_category_language_proportions():
+    # Share of each language's videos that fall in each category
+    data = run_query(
+        """
+            SELECT
+                lower(text_analysis.language) as "language",
+                lower(text_analysis.category) as "category",
+                CAST(COUNT(*) as DOUBLE) / SUM(COUNT(*)) OVER (PARTITION BY lower(text_analysis.language)) as "proportion"
+            FROM metadata
+            INNER JOIN text_analysis USING (id)
+            WHERE text_analysis.category IS NOT NULL
+                AND lower(text_analysis.category) <> 'unknown'
+                AND text_analysis.language IS NOT NULL
+                AND lower(text_analysis.language) <> 'unknown'
+            GROUP BY lower(text_analysis.language), lower(text_analysis.category)
+        """
+    )
+    
+    data.columns = data.columns.str.title()
+    data['Language'] = data['Language'].str.title()
+    data['Category'] = format_categories(data['Category'])
+    
+    return data.sort_values(['Language', 'Proportion'], ascending = [True, False], ignore_index = True)
+
+@st.cache_resource(ttl = 3600)
+def get_category_design_matrices(_data, data_version):
+    # Sampled keyword design matrices per category, built once and shared by every model fit
+    return analysis.category_design_matrices(_data)
+
+@st.cache_data(ttl = 3600)
+def keyword_model_for_category(_data, data_version, category):
+    X, y, classes = get_category_design_matrices(_data, data_version)[category]
+    return analysis.keyword_model(X, y, classes)
+
+@st.cache_data(ttl = 3600)
+def top_predictive_keywords_for_category(_data, data_version, category):
+    keyword_importances = keyword_model_for_category(_data, data_version, category)
+    
+    # Select the 10 largest absolute impacts without sorting every keyword
+    impact = np.abs(keyword_importances['Impact'].to_numpy())
+    k = min(10, len(impact))
+    if k == 0:
+        return keyword_importances
+    top = np.argpartition(-impact, k - 1)[:k]
+    top = top[np.argsort(-impact[top], kind = 'stable')]
+    
+    head = keyword_importances.iloc[top]
     return head[head['Impact'] > 0]
 
-st.title("TikTok's Top Influencers")
+@st.cache_data(ttl = 3600)
+def predictive_keywords_figure(_data, data_version, category):
+    # Get predictive keywords
+    pred_keywords = top_predictive_keywords_for_category(_data, data_version, category)
+    
+    # Create bar plot
+    fig = go.Figure()
+    
+    # Add bars with different colors for positive/negative values
+    fig.add_trace(
+        go.Bar(
+            x=pred_keywords['Keyword'],
+            y=pred_keywords['Impact'],
+            texttemplate='%{y:,.0f}',
+            textposition='outside',
+            marker_color=np.where(
+                pred_keywords['Impact'].to_numpy() >= 0, 'rgb(55, 126, 184)', 'rgb(228, 26, 28)'
+            )
+        )
+    )
+    
+    # Update layout
+    fig.update_layout(
+        title={
+            'text': f"Keywords Most Predictive of Views in {category}",
+            'x': 0.5,
+            'xanchor': 'center'
+        },
+        xaxis_title=None,
+        yaxis_title="Impact on Views",
+        height=500,  # Increased height
+        showlegend=False,
+        xaxis=dict(tickangle=45),
+        margin=dict(l=150, r=150, t=50, b=100),  # Increased left/right margins
+        yaxis=dict(
+            zeroline=True,
+            zerolinewidth=2,
+            zerolinecolor='black',
+            automargin=True  # Added automargin
+        ),
+        bargap=0.2  # Added gap between bars
+    )
+    
+    return fig
+
+@st.cache_data(ttl = 3600)
+def loglog_spline(_data, data_version, x_metric, y_metric, n_bins=60):
+    # Trend line points, or None when there are too few distinct values to fit one
+    return analysis.loglog_spline(_data, x_metric, y_metric, n_bins)
+
+def loglog_scatter_figure(data, data_version, x_metric, y_metric):
+    # Fit trend line (cached per metric pair)
+    trend = loglog_spline(data, data_version, x_metric, y_metric)
+    
+    # Create figure
+    fig = go.Figure()
+    
+    # Add scatter plot (using original data, drawn with WebGL)
+    fig.add_trace(go.Scattergl(
+        x=data[x_metric],
+        y=data[y_metric],
+        mode='markers',
+        name='Data',
+        marker=dict(size=4)
+    ))
+    
+    # Add spline when there was enough data to fit one
+    if trend is not None:
+        x_smooth, y_smooth = trend
+        fig.add_trace(go.Scatter(
+            x=x_smooth,
+            y=y_smooth,
+            mode='lines',
+            name='Trend',
+            line=dict(color='red', width=2)
+        ))
+    
+    fig.update_layout(
+        title={
+            'text': f"{x_metric} vs {y_metric}",
+            'x': 0.5,
+            'xanchor': 'center'
+        },
+        xaxis_title=x_metric,
+        yaxis_title=y_metric,
+        xaxis_type="log",
+        yaxis_type="log",
+        showlegend=False,
+        height=400,
+        margin=dict(t=30, l=10, r=10, b=10)
+    )
+    
+    return fig
+
+@st.cache_data(ttl = 3600)
+def metrics_over_time_figure(daily_avg, visible_metrics):
+    # Daily averages are computed in Athena; the small frame is hashed, so a refreshed query misses the cache
+    # Create figure
+    fig = go.Figure()
+    
+    # Add a trace for each selected metric
+    for metric in visible_metrics:
+        fig.add_trace(
+            go.Scatter(
+                x = daily_avg.index,
+                y = daily_avg[metric].values,
+                name = metric,
+                mode = 'markers',
+                marker = dict(size = 4)
+            )
+        )
+    
+    # Update layout
+    fig.update_layout(
+        title={
+            'text': "Metrics Over Time",
+            'x': 0.5,
+            'xanchor': 'center'
+        },
+        xaxis_title="Date",
+        yaxis_title="Value",
+        height=400,
+        showlegend=True,
+        yaxis_type="log"
+    )
+    
+    return fig
 
-stats = get_profile_stats()
-videos_analyzed = get_profile_videos_analyzed()
+@st.cache_data(ttl = 3600)
+def get_ratios(_data, data_version):
+    # Per-video ratio for every ordered pair of metrics alongside the upload dates
+    return analysis.metric_ratios(_data)
 
-quality = stats["quality"]
-quality = quality.merge(videos_analyzed, on = "Profile", how = "left")
-quality['Videos Analyzed'] = quality['Videos Analyzed'].fillna(0)
+@st.cache_data(ttl = 3600)
+def get_metric_correlations(_data, data_version):
+    # Pearson and Spearman matrices for every metric pair, computed once per load
+    metric_data = _data[["Views", "Likes", "Comments", "Reposts", "Duration"]]
+    return {
+        "pearson": metric_data.corr(method='pearson'),
+        "spearman": metric_data.corr(method='spearman')
+    }
+
+@st.cache_data(ttl = 3600)
+def get_language_list(_data, data_version):
+    # Distinct languages, computed once per load instead of on every rerun
+    # Videos without a detected language are loaded as 'unknown' and left out of the per-language views
+    return tuple(sorted(lang for lang in _data['Language'].dropna().unique() if lang.lower() != 'unknown'))
+
+@st.cache_data(ttl = 3600)
+def get_category_list(_data, data_version):
+    return tuple(sorted(_data['Category'].dropna().unique()))
+
+@st.cache_data(ttl = 3600)
+def get_category_sizes(_data, data_version):
+    # Number of videos in each category
+    return _data.groupby('Category', observed=True).size()
+
+@st.cache_data(ttl = 3600)
+def get_interaction_rate_stats(_data, data_version):
+    # Mean and standard deviation of per-video interaction rates for each category, in one groupby
+    # Rates are only plotted as percentages, so single precision is plenty
+    counts = _data[['Views', 'Likes', 'Comments', 'Reposts']].astype(np.float32)
+    views = counts['Views']
+    rates = pd.DataFrame({
+        'Category': _data['Category'],
+        'Likes Rate': counts['Likes'] / views,
+        'Comments Rate': counts['Comments'] / views,
+        'Reposts Rate': counts['Reposts'] / views,
+        'Has Views': views > 0
+    })
+    
+    return rates.groupby('Category', observed=True).agg(**{
+        'Likes Rate': ('Likes Rate', 'mean'),
+        'Comments Rate': ('Comments Rate', 'mean'),
+        'Reposts Rate': ('Reposts Rate', 'mean'),
+        'Likes Rate Std': ('Likes Rate', 'std'),
+        'Comments Rate Std': ('Comments Rate', 'std'),
+        'Reposts Rate Std': ('Reposts Rate', 'std'),
+        'Videos': ('Has Views', 'size'),
+        'Has Views': ('Has Views', 'any')
+    }).reset_index()
 
-profiles = quality['Profile'].unique().tolist()
+@st.cache_data(ttl = 3600)
+def get_long_keywords(_data, data_version, language):
+    # One row per (category, keyword) for a language's videos; videos without keywords are dropped
+    return (_data.loc[_data['Language'] == language, ['Category', 'Keywords']]
+            .explode('Keywords', ignore_index=True)
+            .rename(columns={'Keywords': 'Keyword'})
+            .dropna(subset=['Keyword']))
+
+@st.cache_data(ttl = 3600)
+def get_english_keyword_proportions(_data, data_version):
+    # Share of each category's English keywords taken by each keyword
+    keyword_df = get_long_keywords(_data, data_version, 'english')
+    
+    # Calculate proportions within each category
+    category_counts = keyword_df.groupby('Category', observed=True)['Keyword'].count()
+    keyword_props = (keyword_df.groupby(['Category', 'Keyword'], observed=True)
+                    .size()
+                    .reset_index(name='count'))
+    
+    # Calculate proportion within each category
+    keyword_props['proportion'] = (keyword_props['count'] /
+                                   keyword_props.groupby('Category', observed=True)['count'].transform('sum'))
+    
+    return category_counts, keyword_props
+
+@st.cache_data(ttl = 3600)
+def get_metric_histograms(_data, data_version, bins=80):
+    # Bin counts and edges for each metric's distribution
+    return {
+        metric: np.histogram(_data[metric].dropna().to_numpy(), bins=bins)
+        for metric in ["Views", "Likes", "Comments", "Reposts", "Duration"]
+    }
+
+@st.cache_data(ttl = 3600)
+def log_densities_by(_data, data_version, group_column, metric, n_points=100):
+    # Density curves of log10(metric) for every language/category at once, on a shared grid
+    return analysis.log_densities_by(_data, group_column, metric, n_points)
+
+st.title("TikTok's Top Influencers")
+
+# Run the cold-start queries concurrently; on later reruns every call is a cache hit
+loaders = [
+    get_profile_stats,
+    get_all_profiles_data,
+    get_daily_metric_averages,
+    get_language_daily_averages,
+    get_category_language_proportions,
+    get_category_daily_averages
+]
+with ThreadPoolExecutor(
+    max_workers = len(loaders),
+    initializer = add_script_run_ctx,
+    initargs = (None, get_script_run_ctx())
+) as executor:
+    futures = [executor.submit(loader) for loader in loaders]
+    stats, all_profiles_data = futures[0].result(), futures[1].result()
+    # Derived helpers take the frame unhashed (_data) and are keyed on its load time instead
+    data_version = all_profiles_data.attrs['loaded_at']
+    for future in futures[2:]:
+        future.result()
 
 st.write('# Video Metrics')
 col1, col2 = st.columns(2)
@@ -266,130 +630,57 @@ with col2:
     
     with st.expander("### Data Quality", expanded=False):
         st.dataframe(
-            quality.set_index("Profile"),
+            stats["quality"].set_index("Profile"),
             use_container_width=True
         )
 
-all_profiles_data = get_all_profiles_data()
-
 # Histograms row
 with st.expander("How are the video metrics distributed?", expanded=False):
-    hist_cols = st.columns(5)
-    
-    with hist_cols[0]:
-        fig_views = px.histogram(
-            all_profiles_data, 
-            x = "Views", 
-            title = "Views Distribution",
-            log_x = False
-        )
-        fig_views.update_layout(
-            showlegend=False,
-            title={
-                'text': "Views Distribution",
-                'x': 0.5,
-                'xanchor': 'center'
-            }
-        )
-        st.plotly_chart(fig_views, use_container_width = True)
-    
-    with hist_cols[1]:
-        fig_likes = px.histogram(
-            all_profiles_data, 
-            x = "Likes", 
-            title = "Likes Distribution",
-            log_x = False
-        )
-        fig_likes.update_layout(showlegend = False)
-        st.plotly_chart(fig_likes, use_container_width = True)
-    
-    with hist_cols[2]:
-        fig_comments = px.histogram(
-            all_profiles_data, 
-            x = "Comments", 
-            title = "Comments Distribution",
-            log_x = False
-        )
-        fig_comments.update_layout(showlegend = False)
-        st.plotly_chart(fig_comments, use_container_width = True)
-    
-    with hist_cols[3]:
-        fig_reposts = px.histogram(
-            all_profiles_data, 
-            x = "Reposts", 
-            title = "Reposts Distribution",
-            log_x = False
-        )
-        fig_reposts.update_layout(showlegend = False)
-        st.plotly_chart(fig_reposts, use_container_width = True)
-    
-    with hist_cols[4]:
-        fig_duration = px.histogram(
-            all_profiles_data, 
-            x = "Duration", 
-            title = "Duration Distribution"
+    # Bins are computed once on the server; the browser only gets the bar heights
+    histograms = get_metric_histograms(all_profiles_data, data_version)
+    fig_hist = make_subplots(rows = 1, cols = len(histograms), subplot_titles = [f"{metric} Distribution" for metric in histograms])
+    for i, (metric, (counts, edges)) in enumerate(histograms.items()):
+        fig_hist.add_trace(
+            go.Bar(
+                x = (edges[:-1] + edges[1:]) / 2,
+                y = counts,
+                width = np.diff(edges),
+                name = metric
+            ),
+            row = 1,
+            col = i + 1
         )
-        fig_duration.update_layout(showlegend = False)
-        st.plotly_chart(fig_duration, use_container_width = True)
+    fig_hist.update_layout(
+        showlegend = False,
+        bargap = 0,
+        title = {
+            'text': "Metric Distributions",
+            'x': 0.5,
+            'xanchor': 'center'
+        }
+    )
+    st.plotly_chart(fig_hist, use_container_width = True)
 
 # Time series section
 with st.expander("How have these metrics changed over time?", expanded=False):
     # Time series plot
     ts_col1, ts_col2 = st.columns([3, 1])
     
-    # Define available metrics and their default states
-    metrics = {
-        "Views": True,
-        "Likes": False,
-        "Comments": False,
-        "Reposts": False,
-        "Duration": False
-    }
+    # Define available metrics
+    metrics = ["Views", "Likes", "Comments", "Reposts", "Duration"]
     
-    # Checkbox column
+    # Metric selection column
     with ts_col2:
-        st.write("Select Metrics")
-        metric_toggles = {
-            metric: st.checkbox(metric, value = default_state)
-            for metric, default_state in metrics.items()
-        }
+        visible_metrics = st.multiselect(
+            "Select Metrics",
+            metrics,
+            default = ["Views"]
+        )
 
     # Plot column
     with ts_col1:
-        # Create figure
-        fig = go.Figure()
-        
-        # Add a trace for each selected metric
-        for metric, is_selected in metric_toggles.items():
-            if is_selected:
-                # Calculate daily averages
-                daily_avg = all_profiles_data.groupby('Upload Date')[metric].mean()
-                
-                # Add trace
-                fig.add_trace(
-                    go.Scatter(
-                        x = daily_avg.index,
-                        y = daily_avg.values,
-                        name = metric,
-                        mode = 'markers',
-                        marker = dict(size = 4)
-                    )
-                )
-        
-        # Update layout
-        fig.update_layout(
-            title={
-                'text': "Metrics Over Time",
-                'x': 0.5,
-                'xanchor': 'center'
-            },
-            xaxis_title="Date",
-            yaxis_title="Value",
-            height=400,
-            showlegend=True,
-            yaxis_type="log"
-        )
-        
+        # Figures are cached per metric selection
+        fig = metrics_over_time_figure(get_daily_metric_averages(), tuple(visible_metrics))
         st.plotly_chart(fig, use_container_width = True)
 
     # Add a separator
@@ -415,19 +706,16 @@ with st.expander("How have these metrics changed over time?", expanded=False):
     # Plot column
     with ratio_col1:
         if numerator != denominator:
-            # Calculate ratio for each video
-            ratio_data = pd.DataFrame({
-                'Date': all_profiles_data['Upload Date'],
-                'Ratio': all_profiles_data[numerator] / all_profiles_data[denominator]
-            })
+            # Ratios are precomputed for every metric pair, with the matching upload dates
+            ratios = get_ratios(all_profiles_data, data_version)
             
             # Create figure
             fig = go.Figure()
             
             fig.add_trace(
-                go.Scatter(
-                    x = ratio_data['Date'],
-                    y = ratio_data['Ratio'],
+                go.Scattergl(
+                    x = ratios['Upload Date'],
+                    y = ratios[f"{numerator}/{denominator}"],
                     mode = 'markers',
                     marker = dict(size = 4),
                     name = f'{numerator}/{denominator} Ratio'
@@ -474,9 +762,10 @@ with st.expander("What is their relationship?", expanded=False):
         )
         
         if metric_a != metric_b:
-            # Calculate correlations
-            pearson_corr = all_profiles_data[metric_a].corr(all_profiles_data[metric_b], method='pearson')
-            spearman_corr = all_profiles_data[metric_a].corr(all_profiles_data[metric_b], method='spearman')
+            # Look up precomputed correlations
+            correlations = get_metric_correlations(all_profiles_data, data_version)
+            pearson_corr = correlations["pearson"].loc[metric_a, metric_b]
+            spearman_corr = correlations["spearman"].loc[metric_a, metric_b]
             
             st.write("---")
             st.write("Correlations")
@@ -486,123 +775,11 @@ with st.expander("What is their relationship?", expanded=False):
     if metric_a != metric_b:
         # A vs B plot
         with corr_col1:
-            # Prepare data for spline fitting
-            ab_data = all_profiles_data[[metric_a, metric_b]].copy()
-            ab_data = ab_data[ab_data[[metric_a, metric_b]].gt(0).all(axis=1)]  # Remove zeros and negatives
-            ab_data = ab_data.sort_values(metric_a)
-            ab_data = ab_data.groupby(metric_a)[metric_b].mean().reset_index()  # Handle duplicates
-            
-            # Fit spline with higher smoothing factor
-            spl = interp.UnivariateSpline(
-                np.log10(ab_data[metric_a]), 
-                np.log10(ab_data[metric_b]),
-                s=len(ab_data)  # Increased from 0.1 to 1.0 times the data length
-            )
-            
-            # Generate points for smooth curve
-            x_smooth = np.logspace(
-                np.log10(ab_data[metric_a].min()),
-                np.log10(ab_data[metric_a].max()),
-                100
-            )
-            y_smooth = 10 ** spl(np.log10(x_smooth))
-            
-            # Create figure
-            fig_ab = go.Figure()
-            
-            # Add scatter plot (using original data)
-            fig_ab.add_trace(go.Scatter(
-                x=all_profiles_data[metric_a],
-                y=all_profiles_data[metric_b],
-                mode='markers',
-                name='Data',
-                marker=dict(size=4)
-            ))
-            
-            # Add spline
-            fig_ab.add_trace(go.Scatter(
-                x=x_smooth,
-                y=y_smooth,
-                mode='lines',
-                name='Trend',
-                line=dict(color='red', width=2)
-            ))
-            
-            fig_ab.update_layout(
-                title={
-                    'text': f"{metric_a} vs {metric_b}",
-                    'x': 0.5,
-                    'xanchor': 'center'
-                },
-                xaxis_title=metric_a,
-                yaxis_title=metric_b,
-                xaxis_type="log",
-                yaxis_type="log",
-                showlegend=False,
-                height=400,
-                margin=dict(t=30, l=10, r=10, b=10)
-            )
-            st.plotly_chart(fig_ab, use_container_width=True)
+            st.plotly_chart(loglog_scatter_figure(all_profiles_data, data_version, metric_a, metric_b), use_container_width=True)
         
         # B vs A plot
         with corr_col2:
-            # Prepare data for spline fitting
-            ba_data = all_profiles_data[[metric_b, metric_a]].copy()
-            ba_data = ba_data[ba_data[[metric_b, metric_a]].gt(0).all(axis=1)]  # Remove zeros and negatives
-            ba_data = ba_data.sort_values(metric_b)
-            ba_data = ba_data.groupby(metric_b)[metric_a].mean().reset_index()  # Handle duplicates
-            
-            # Fit spline with higher smoothing factor
-            spl = interp.UnivariateSpline(
-                np.log10(ba_data[metric_b]), 
-                np.log10(ba_data[metric_a]),
-                s=len(ba_data)  # Increased from 0.1 to 1.0 times the data length
-            )
-            
-            # Generate points for smooth curve
-            x_smooth = np.logspace(
-                np.log10(ba_data[metric_b].min()),
-                np.log10(ba_data[metric_b].max()),
-                100
-            )
-            y_smooth = 10 ** spl(np.log10(x_smooth))
-            
-            # Create figure
-            fig_ba = go.Figure()
-            
-            # Add scatter plot (using original data)
-            fig_ba.add_trace(go.Scatter(
-                x=all_profiles_data[metric_b],
-                y=all_profiles_data[metric_a],
-                mode='markers',
-                name='Data',
-                marker=dict(size=4)
-            ))
-            
-            # Add spline
-            fig_ba.add_trace(go.Scatter(
-                x=x_smooth,
-                y=y_smooth,
-                mode='lines',
-                name='Trend',
-                line=dict(color='red', width=2)
-            ))
-            
-            fig_ba.update_layout(
-                title={
-                    'text': f"{metric_b} vs {metric_a}",
-                    'x': 0.5,
-                    'xanchor': 'center'
-                },
-                xaxis_title=metric_b,
-                yaxis_title=metric_a,
-                xaxis_type="log",
-                yaxis_type="log",
-                showlegend=False,
-                height=400,
-                margin=dict(t=30, l=10, r=10, b=10)
-            )
-            st.plotly_chart(fig_ba, use_container_width=True)
+            st.plotly_chart(loglog_scatter_figure(all_profiles_data, data_version, metric_b, metric_a), use_container_width=True)
     else:
         with corr_col1:
             st.warning("Please select different metrics for correlation analysis")
@@ -626,39 +803,25 @@ with st.expander("What are the metrics of videos in each language?", expanded=Fa
     # Plot column
     with lang_col1:
         # Get unique languages and create KDE plot
-        languages = all_profiles_data['Language'].dropna().unique()
+        languages = get_language_list(all_profiles_data, data_version)
         
         # Create figure
         fig = go.Figure()
         
-        # Add a KDE for each language
-        for lang in languages:
-            lang_data = all_profiles_data[all_profiles_data['Language'] == lang][lang_metric]
+        # Add a KDE for each language (cached per metric)
+        for lang, (kde_points, kde_values) in log_densities_by(all_profiles_data, data_version, 'Language', lang_metric).items():
+            if lang not in languages:
+                continue
             
-            # Only plot if we have enough data points (at least 3)
-            if len(lang_data) > 3 and not lang_data.empty:
-                # Remove zeros and negative values for log scale
-                lang_data = lang_data[lang_data > 0]
-                
-                if len(lang_data) > 3:  # Check again after filtering
-                    # Calculate KDE
-                    kde_points = np.logspace(
-                        np.log10(lang_data.min()),
-                        np.log10(lang_data.max()),
-                        100
-                    )
-                    kde = scipy.stats.gaussian_kde(np.log10(lang_data))
-                    kde_values = kde(np.log10(kde_points))
-                    
-                    # Add trace
-                    fig.add_trace(go.Scatter(
-                        x=kde_points,
-                        y=kde_values,
-                        name=lang,
-                        mode='lines',
-                        fill='tonexty',
-                        line=dict(width=2)
-                    ))
+            # Add trace
+            fig.add_trace(go.Scatter(
+                x=kde_points,
+                y=kde_values,
+                name=lang,
+                mode='lines',
+                fill='tonexty',
+                line=dict(width=2)
+            ))
         
         # Update layout
         fig.update_layout(
@@ -720,6 +883,9 @@ with st.expander("What are the metrics of videos in each language?", expanded=Fa
     
     # Plot column
     with ts_lang_col1:
+        # Daily averages per language are computed in Athena
+        language_daily_avg = get_language_daily_averages()
+        
         # Create figure
         fig = go.Figure()
         
@@ -727,17 +893,14 @@ with st.expander("What are the metrics of videos in each language?", expanded=Fa
         for lang, is_selected in language_toggles.items():
             if is_selected:
                 # Filter data for this language
-                lang_data = all_profiles_data[all_profiles_data['Language'].str.title() == lang]
+                daily_avg = language_daily_avg[language_daily_avg['Language'] == lang]
                 
-                if not lang_data.empty:
-                    # Calculate daily averages for this language
-                    daily_avg = lang_data.groupby('Upload Date')[lang_metric].mean()
-                    
+                if not daily_avg.empty:
                     # Add trace
                     fig.add_trace(
                         go.Scatter(
-                            x=daily_avg.index,
-                            y=daily_avg.values,
+                            x=daily_avg['Upload Date'],
+                            y=daily_avg[lang_metric],
                             name=lang,
                             mode='markers',
                             marker=dict(size=4)
@@ -762,26 +925,15 @@ with st.expander("What are the metrics of videos in each language?", expanded=Fa
 
 # Category distribution by language section
 with st.expander("What content is made in each language?", expanded=False):
-    # Get valid languages (remove NA/None and 'unknown')
-    languages = all_profiles_data['Language'].dropna()
-    languages = languages[languages.str.lower() != 'unknown']
-    languages = languages.unique()
-    
-    # Calculate category proportions for each language
-    category_props = []
-    
-    for lang in languages:
-        lang_data = all_profiles_data[all_profiles_data['Language'] == lang]
-        if not lang_data.empty:
-            # Calculate proportions
-            props = lang_data['Category'].value_counts(normalize=True).reset_index()
-            props.columns = ['Category', 'Proportion']
-            props['Language'] = lang.title()  # Capitalize language names
-            category_props.append(props)
-    
-    if category_props:  # Only proceed if we have data
-        # Combine all proportions
-        category_props = pd.concat(category_props, ignore_index=True)
+    # Get valid languages (NA/None and 'unknown' are already removed)
+    languages = list(get_language_list(all_profiles_data, data_version))
+    
+    # Category proportions for each language are computed in Athena
+    category_props = get_category_language_proportions()
+    
+    if not category_props.empty:  # Only proceed if we have data
+        # Split once by language instead of filtering the frame for every subplot
+        props_by_language = dict(tuple(category_props.groupby('Language', sort=False)))
         
         # Create subplot grid
         n_langs = len(languages)
@@ -802,7 +954,7 @@ with st.expander("What content is made in each language?", expanded=False):
             row = (i // n_cols) + 1
             col = (i % n_cols) + 1
             
-            lang_props = category_props[category_props['Language'] == lang.title()]
+            lang_props = props_by_language.get(lang.title(), category_props.iloc[:0])
             
             fig.add_trace(
                 go.Bar(
@@ -868,39 +1020,21 @@ with st.expander("What are the metrics of videos in each category?", expanded=Fa
     # Plot column
     with cat_col1:
         # Get unique categories and create KDE plot
-        categories = all_profiles_data['Category'].dropna().unique()
+        categories = get_category_list(all_profiles_data, data_version)
         
-        # Create figure
+        # Create figure with a KDE for each category (cached per metric), added in one call
         fig = go.Figure()
-        
-        # Add a KDE for each category
-        for category in categories:
-            cat_data = all_profiles_data[all_profiles_data['Category'] == category][cat_metric]
-            
-            # Only plot if we have enough data points (at least 3)
-            if len(cat_data) > 3 and not cat_data.empty:
-                # Remove zeros and negative values for log scale
-                cat_data = cat_data[cat_data > 0]
-                
-                if len(cat_data) > 3:  # Check again after filtering
-                    # Calculate KDE
-                    kde_points = np.logspace(
-                        np.log10(cat_data.min()),
-                        np.log10(cat_data.max()),
-                        100
-                    )
-                    kde = scipy.stats.gaussian_kde(np.log10(cat_data))
-                    kde_values = kde(np.log10(kde_points))
-                    
-                    # Add trace
-                    fig.add_trace(go.Scatter(
-                        x=kde_points,
-                        y=kde_values,
-                        name=category,
-                        mode='lines',
-                        fill='tonexty',
-                        line=dict(width=2)
-                    ))
+        fig.add_traces([
+            go.Scatter(
+                x=kde_points,
+                y=kde_values,
+                name=category,
+                mode='lines',
+                fill='tonexty',
+                line=dict(width=2)
+            )
+            for category, (kde_points, kde_values) in log_densities_by(all_profiles_data, data_version, 'Category', cat_metric).items()
+        ])
         
         # Update layout
         fig.update_layout(
@@ -921,28 +1055,23 @@ with st.expander("What are the metrics of videos in each category?", expanded=Fa
     # Time series by category
     st.write("---")  # Add separator between plots
     
-    # Create figure
-    fig = go.Figure()
+    # Daily averages per category are computed in Athena; one column per category
+    category_daily_avg = get_category_daily_averages().pivot(index='Upload Date', columns='Category', values=cat_metric)
     
-    # Add a trace for each category
-    for category in categories:
-        # Filter data for this category
-        cat_data = all_profiles_data[all_profiles_data['Category'] == category]
-        
-        if not cat_data.empty:
-            # Calculate daily averages for this category
-            daily_avg = cat_data.groupby('Upload Date')[cat_metric].mean()
-            
-            # Add trace
-            fig.add_trace(
-                go.Scatter(
-                    x=daily_avg.index,
-                    y=daily_avg.values,
-                    name=category,
-                    mode='markers',
-                    marker=dict(size=4)
-                )
-            )
+    # Create figure with a trace for each category, added in one call
+    fig = go.Figure()
+    fig.add_traces([
+        go.Scatter(
+            x=daily_avg.index,
+            y=daily_avg.values,
+            name=category,
+            mode='markers',
+            marker=dict(size=4)
+        )
+        for category in categories
+        if category in category_daily_avg
+        for daily_avg in [category_daily_avg[category].dropna()]
+    ])
     
     # Update layout
     fig.update_layout(
@@ -962,37 +1091,8 @@ with st.expander("What are the metrics of videos in each category?", expanded=Fa
 
 # Keyword analysis section
 with st.expander("What are the most popular keywords in English for each category of content?", expanded=False):
-    # Filter for English content
-    english_content = all_profiles_data[all_profiles_data['Language'] == 'english']
-    
-    # Process keywords and categories
-    keyword_data = []
-    
-    for _, row in english_content.iterrows():
-        category = row['Category']
-        keywords = row['Keywords'].tolist()
-        
-        # Add each keyword with its category
-        for keyword in keywords:
-            keyword_data.append({
-                'Category': category,
-                'Keyword': keyword
-            })
-    
-    # Convert to DataFrame and calculate proportions
-    keyword_df = pd.DataFrame(keyword_data)
-    
-    # Calculate proportions within each category
-    category_counts = keyword_df.groupby('Category')['Keyword'].count()
-    keyword_props = (keyword_df.groupby(['Category', 'Keyword'])
-                    .size()
-                    .reset_index(name='count'))
-    
-    # Calculate proportion within each category
-    keyword_props['proportion'] = keyword_props.apply(
-        lambda x: x['count'] / category_counts[x['Category']], 
-        axis=1
-    )
+    # Keyword proportions for English content are cached across reruns
+    category_counts, keyword_props = get_english_keyword_proportions(all_profiles_data, data_version)
     
     # Get top 20 categories by video count
     top_categories = category_counts.nlargest(20).index
@@ -1006,45 +1106,42 @@ with st.expander("What are the most popular keywords in English for each categor
         horizontal_spacing=0.05
     )
     
-    # Add bar plots for each category
-    for i, category in enumerate(top_categories):
-        row = (i // 5) + 1  # Integer division by 5 for row number (1-4)
-        col = (i % 5) + 1   # Modulo 5 for column number (1-5)
-        
-        # Get top 10 keywords for this category
-        cat_data = (keyword_props[keyword_props['Category'] == category]
-                   .nlargest(10, 'proportion'))
-        
-        # Add bars
-        fig.add_trace(
+    # Top 10 keywords for every top category from one sort, split once by category
+    top_keywords = (keyword_props[keyword_props['Category'].isin(top_categories)]
+                    .sort_values(['Category', 'proportion'], ascending=[True, False])
+                    .groupby('Category', observed=True)
+                    .head(10))
+    top_keywords_by_category = dict(tuple(top_keywords.groupby('Category', observed=True)))
+    
+    # Add bar plots for each category in one call (row-major over the 4 x 5 grid)
+    fig.add_traces(
+        [
             go.Bar(
-                x=cat_data['Keyword'],
-                y=cat_data['proportion'],
-                text=cat_data['proportion'].apply(lambda x: f'{x:.1%}'),
+                x=top_keywords_by_category[category]['Keyword'],
+                y=top_keywords_by_category[category]['proportion'],
+                texttemplate='%{y:.1%}',
                 textposition='auto',
                 showlegend=False
-            ),
-            row=row,
-            col=col
-        )
-        
-        # Update axes
-        fig.update_xaxes(
-            tickangle=45,
-            row=row,
-            col=col,
-            tickfont=dict(size=8),
-            title=None
-        )
-        fig.update_yaxes(
-            range=[0, 1],
-            tickformat='.0%',
-            row=row,
-            col=col,
-            tickfont=dict(size=8),
-            title=None,
-            nticks=5
-        )
+            )
+            for category in top_categories
+        ],
+        rows=[(i // 5) + 1 for i in range(len(top_categories))],
+        cols=[(i % 5) + 1 for i in range(len(top_categories))]
+    )
+    
+    # Update axes (same settings for every subplot)
+    fig.update_xaxes(
+        tickangle=45,
+        tickfont=dict(size=8),
+        title=None
+    )
+    fig.update_yaxes(
+        range=[0, 1],
+        tickformat='.0%',
+        tickfont=dict(size=8),
+        title=None,
+        nticks=5
+    )
     
     # Update overall layout
     fig.update_layout(
@@ -1062,126 +1159,89 @@ with st.expander("What are the most popular keywords in English for each categor
 
 # Interaction rates section
 with st.expander("What content categories have the most interaction per view?", expanded=False):
-    # Calculate average interaction rates for each category
-    interaction_data = []
-    
-    for category in all_profiles_data['Category'].unique():
-        cat_data = all_profiles_data[all_profiles_data['Category'] == category]
-        
-        # Calculate mean rates
-        likes_rate = (cat_data['Likes'] / cat_data['Views']).mean()
-        comments_rate = (cat_data['Comments'] / cat_data['Views']).mean()
-        reposts_rate = (cat_data['Reposts'] / cat_data['Views']).mean()
-        
-        interaction_data.append({
-            'Category': category,
-            'Likes Rate': likes_rate,
-            'Comments Rate': comments_rate,
-            'Reposts Rate': reposts_rate
-        })
+    # Average interaction rates for each category
+    interaction_df = get_interaction_rate_stats(all_profiles_data, data_version)
     
-    interaction_df = pd.DataFrame(interaction_data)
-    
-    # Create plots for each metric
+    # One figure with a subplot for each metric
     metrics = ['Likes Rate', 'Comments Rate', 'Reposts Rate']
+    fig = make_subplots(
+        rows=1,
+        cols=len(metrics),
+        subplot_titles=[f"Average {metric.replace('Rate', '')}per View by Category" for metric in metrics],
+        horizontal_spacing=0.05
+    )
     
-    for metric in metrics:
+    for i, metric in enumerate(metrics):
         # Sort data by rate and remove zeros
         sorted_data = interaction_df[interaction_df[metric] > 0].sort_values(metric, ascending=False)
         
-        if not sorted_data.empty:
-            # Create bar plot
-            fig = go.Figure()
-            
-            fig.add_trace(
-                go.Bar(
-                    x=sorted_data['Category'],
-                    y=sorted_data[metric],
-                    text=sorted_data[metric].apply(lambda x: f'{x:.1%}'),
-                    textposition='auto'
-                )
-            )
-            
-            # Update layout
-            fig.update_layout(
-                title={
-                    'text': f"Average {metric.replace('Rate', '')}per View by Category",
-                    'x': 0.5,
-                    'xanchor': 'center'
-                },
-                xaxis_title=None,
-                yaxis_title="Interaction Rate",
-                height=400,
-                showlegend=False,
-                yaxis=dict(tickformat='.1%'),
-                xaxis=dict(tickangle=45),
-                margin=dict(b=100)
-            )
-            
-            st.plotly_chart(fig, use_container_width=True)
+        fig.add_trace(
+            go.Bar(
+                x=sorted_data['Category'],
+                y=sorted_data[metric],
+                texttemplate='%{y:.1%}',
+                textposition='auto'
+            ),
+            row=1,
+            col=i + 1
+        )
+    
+    # Update layout
+    fig.update_layout(
+        height=450,
+        showlegend=False,
+        margin=dict(b=100)
+    )
+    fig.update_xaxes(tickangle=45)
+    fig.update_yaxes(tickformat='.1%')
+    fig.update_yaxes(title_text="Interaction Rate", row=1, col=1)
+    
+    st.plotly_chart(fig, use_container_width=True)
 
 # Interaction rate consistency section
 with st.expander("What content categories are the most consistent in interactions per view?", expanded=False):
-    # Calculate standard deviation of interaction rates for each category
-    consistency_data = []
+    # Standard deviation of interaction rates for each category
+    consistency_df = get_interaction_rate_stats(all_profiles_data, data_version)
     
-    for category in all_profiles_data['Category'].unique():
-        cat_data = all_profiles_data[all_profiles_data['Category'] == category]
-        
-        # Only calculate if we have enough data points and non-zero views
-        if len(cat_data) > 1 and (cat_data['Views'] > 0).any():
-            # Calculate std of rates
-            likes_std = (cat_data['Likes'] / cat_data['Views']).std()
-            comments_std = (cat_data['Comments'] / cat_data['Views']).std()
-            reposts_std = (cat_data['Reposts'] / cat_data['Views']).std()
-            
-            # Only add if all values are valid
-            if pd.notna([likes_std, comments_std, reposts_std]).all():
-                consistency_data.append({
-                    'Category': category,
-                    'Likes Rate Std': likes_std,
-                    'Comments Rate Std': comments_std,
-                    'Reposts Rate Std': reposts_std
-                })
-    
-    consistency_df = pd.DataFrame(consistency_data)
-    
-    # Create plots for each metric
+    # Only keep categories with enough data points, non-zero views and valid values
+    consistency_df = consistency_df[(consistency_df['Videos'] > 1) & consistency_df['Has Views']]
+    consistency_df = consistency_df.dropna(subset=['Likes Rate Std', 'Comments Rate Std', 'Reposts Rate Std'])
+    
+    # One figure with a subplot for each metric
     metrics = ['Likes Rate Std', 'Comments Rate Std', 'Reposts Rate Std']
+    fig = make_subplots(
+        rows=1,
+        cols=len(metrics),
+        subplot_titles=[f"Consistency in {metric.replace('Rate Std', '')}per View by Category" for metric in metrics],
+        horizontal_spacing=0.05
+    )
     
-    for metric in metrics:
+    for i, metric in enumerate(metrics):
         # Sort data by standard deviation (ascending for consistency - lower is more consistent)
         sorted_data = consistency_df.sort_values(metric, ascending=True)
         
-        # Create bar plot
-        fig = go.Figure()
-        
         fig.add_trace(
             go.Bar(
                 x=sorted_data['Category'],
                 y=sorted_data[metric],
-                text=sorted_data[metric].apply(lambda x: f'{x:.1%}'),
+                texttemplate='%{y:.1%}',
                 textposition='auto'
-            )
-        )
-        
-        # Update layout
-        fig.update_layout(
-            title={
-                'text': f"Consistency in {metric.replace('Rate Std', '')}per View by Category",
-                'x': 0.5,
-                'xanchor': 'center'
-            },
-            xaxis_title=None,
-            yaxis_title="Standard Deviation of Interaction Rate",
-            height=400,
-            showlegend=False,
-            yaxis=dict(tickformat='.1%'),
-            xaxis=dict(tickangle=45),
-            margin=dict(b=100)
+            ),
+            row=1,
+            col=i + 1
         )
-        
-        st.plotly_chart(fig, use_container_width=True)
+    
+    # Update layout
+    fig.update_layout(
+        height=450,
+        showlegend=False,
+        margin=dict(b=100)
+    )
+    fig.update_xaxes(tickangle=45)
+    fig.update_yaxes(tickformat='.1%')
+    fig.update_yaxes(title_text="Standard Deviation of Interaction Rate", row=1, col=1)
+    
+    st.plotly_chart(fig, use_container_width=True)
 
 # Predictive keywords section
 with st.expander("Controlling for profile and duration, what keywords are predictive of view count in each category of content?", expanded=False):
@@ -1193,57 +1253,18 @@ with st.expander("Controlling for profile and duration, what keywords are predic
         st.write("Select Category")
         selected_category = st.selectbox(
             "Category",
-            options=all_profiles_data['Category'].unique(),
+            options=get_category_list(all_profiles_data, data_version),
             key="pred_category"
         )
         
         # Check if category has enough samples
-        category_size = len(all_profiles_data[all_profiles_data['Category'] == selected_category])
+        category_size = get_category_sizes(all_profiles_data, data_version).get(selected_category, 0)
         if category_size < 100:
             st.warning(f"Not enough samples for {selected_category} (needs 100, has {category_size})")
         else:
-            # Get predictive keywords
-            pred_keywords = top_predictive_keywords_for_category(selected_category)
-            
             # Plot column
             with pred_col1:
-                # Create bar plot
-                fig = go.Figure()
-                
-                # Add bars with different colors for positive/negative values
-                fig.add_trace(
-                    go.Bar(
-                        x=pred_keywords['Keyword'],
-                        y=pred_keywords['Impact'],
-                        text=pred_keywords['Impact'].apply(lambda x: f'{x:,.0f}'),
-                        textposition='outside',
-                        marker_color=pred_keywords['Impact'].apply(
-                            lambda x: 'rgb(55, 126, 184)' if x >= 0 else 'rgb(228, 26, 28)'
-                        )
-                    )
-                )
-                
-                # Update layout
-                fig.update_layout(
-                    title={
-                        'text': f"Keywords Most Predictive of Views in {selected_category}",
-                        'x': 0.5,
-                        'xanchor': 'center'
-                    },
-                    xaxis_title=None,
-                    yaxis_title="Impact on Views",
-                    height=500,  # Increased height
-                    showlegend=False,
-                    xaxis=dict(tickangle=45),
-                    margin=dict(l=150, r=150, t=50, b=100),  # Increased left/right margins
-                    yaxis=dict(
-                        zeroline=True,
-                        zerolinewidth=2,
-                        zerolinecolor='black',
-                        automargin=True  # Added automargin
-                    ),
-                    bargap=0.2  # Added gap between bars
-                )
-                
+                # Figures are cached per category
+                fig = predictive_keywords_figure(all_profiles_data, data_version, selected_category)
                 st.plotly_chart(fig, use_container_width=True)
 
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+import analysis
+
+def make_videos(views, keywords=None, categories=None, profiles=None):
+    # A frame shaped like get_all_profiles_data's, with likes and comments derived from views
+    n = len(views)
+    views = np.asarray(views, dtype=np.int64)
+    return pd.DataFrame({
+        'Profile': pd.Categorical(profiles if profiles is not None else ['alice'] * n),
+        'Upload Date': pd.date_range('2024-01-01', periods=n),
+        'Duration': np.arange(1, n + 1) * 10,
+        'Views': views,
+        'Likes': views // 10,
+        'Comments': views // 100,
+        'Reposts': np.zeros(n, dtype=np.int64),
+        'Category': pd.Categorical(categories if categories is not None else ['Comedy'] * n),
+        'Keywords': keywords if keywords is not None else [[] for _ in range(n)]
+    })
+
+def test_log_densities_by_empty_data():
+    assert analysis.log_densities_by(make_videos([]), 'Category', 'Views') == {}
+
+def test_log_densities_by_without_positive_values():
+    assert analysis.log_densities_by(make_videos([0, 0, 0, 0, 0]), 'Category', 'Views') == {}
+
+def test_log_densities_by_single_value():
+    densities = analysis.log_densities_by(make_videos([100] * 5), 'Category', 'Views', n_points=50)
+
+    points, values = densities['Comedy']
+    assert len(points) == len(values) == 50
+    assert np.all(np.isfinite(values))
+    assert points.min() < 100 < points.max()
+
+def test_log_densities_by_drops_groups_with_few_points():
+    data = make_videos([10, 100, 1000, 10000, 5, 50], categories=['Comedy'] * 4 + ['Music'] * 2)
+    densities = analysis.log_densities_by(data, 'Category', 'Views')
+
+    assert list(densities) == ['Comedy']
+    points, values = densities['Comedy']
+    assert np.all(values >= 0) and values.max() > 0
+
+def test_loglog_spline_empty_data():
+    assert analysis.loglog_spline(make_videos([]), 'Views', 'Likes') is None
+
+def test_loglog_spline_single_value():
+    assert analysis.loglog_spline(make_videos([1000] * 10), 'Views', 'Likes') is None
+
+def test_loglog_spline_fits_trend():
+    data = make_videos(np.logspace(2, 6, 200).astype(np.int64))
+    x_smooth, y_smooth = analysis.loglog_spline(data, 'Views', 'Likes')
+
+    assert len(x_smooth) == len(y_smooth) == 100
+    assert np.isclose(x_smooth[0], data['Views'].min()) and np.isclose(x_smooth[-1], data['Views'].max())
+    # Likes are a tenth of views, so the trend follows that line
+    assert np.allclose(y_smooth, x_smooth / 10, rtol=0.2)
+
+def test_metric_ratios_divide_by_zero_is_nan():
+    data = make_videos([1000, 0])
+    ratios = analysis.metric_ratios(data)
+
+    assert ratios.index.equals(data.index)
+    assert (ratios['Upload Date'] == data['Upload Date']).all()
+    assert ratios['Likes/Views'].iloc[0] == np.float32(0.1)
+    assert np.isnan(ratios['Likes/Views'].iloc[1])
+    assert np.isnan(ratios['Views/Reposts']).all()
+
+def test_metric_ratios_empty_data():
+    ratios = analysis.metric_ratios(make_videos([]))
+
+    assert ratios.empty
+    # Upload date plus every ordered pair of the five metrics
+    assert len(ratios.columns) == 1 + 5 * 4
+
+def test_design_matrices_without_keywords():
+    data = make_videos([100, 200, 300], keywords=[[], None, []])
+    X, y, classes = analysis.category_design_matrices(data)['Comedy']
+
+    # Duration plus one profile column, and no keyword columns
+    assert X.shape == (3, 2)
+    assert len(y) == 3 and len(classes) == 0
+
+    importance = analysis.keyword_model(X, y, classes)
+    assert list(importance.columns) == ['Keyword', 'Impact']
+    assert importance.empty
+
+def test_design_matrices_only_include_observed_profiles():
+    data = make_videos(
+        [100, 200, 300, 400],
+        keywords=[['cats'], ['dogs'], ['cats'], ['birds']],
+        categories=['Comedy', 'Comedy', 'Music', 'Music'],
+        profiles=['alice', 'bob', 'carol', 'carol']
+    )
+    matrices = analysis.category_design_matrices(data)
+
+    comedy_X, _, comedy_classes = matrices['Comedy']
+    music_X, _, music_classes = matrices['Music']
+    assert sorted(comedy_classes) == ['cats', 'dogs']
+    assert sorted(music_classes) == ['birds', 'cats']
+    assert comedy_X.shape == (2, 1 + 2 + 2)
+    assert music_X.shape == (2, 1 + 1 + 2)
+
+def test_keyword_model_single_video():
+    data = make_videos([100], keywords=[['cats']])
+    X, y, classes = analysis.category_design_matrices(data)['Comedy']
+    importance = analysis.keyword_model(X, y, classes)
+
+    assert list(importance['Keyword']) == ['cats']
+    assert list(importance['Impact']) == [0]
+
+def test_keyword_model_ranks_predictive_keyword():
+    keywords = [['cats'] if i % 2 else ['dogs'] for i in range(40)]
+    views = [1000 if i % 2 else 100 for i in range(40)]
+    X, y, classes = analysis.category_design_matrices(make_videos(views, keywords=keywords))['Comedy']
+    importance = analysis.keyword_model(X, y, classes).set_index('Keyword')['Impact']
+
+    assert np.all(np.isfinite(importance))
+    assert importance['cats'] > importance['dogs']
@@ -3,12 +3,41 @@ from aws_cdk import (
     aws_batch as batch,
     aws_iam as iam,
     aws_ec2 as ec2,
-    Duration,
     CfnOutput,
     Fn
 )
 from constructs import Construct
 
+# Multipart user data for GPU instances: cloud-config updates plus a shell step
+# preparing the transcriber workspace on instance storage and the ECS agent config
+GPU_USER_DATA = """MIME-Version: 1.0
+Content-Type: multipart/mixed; boundary="==BOUNDARY=="
+
+--==BOUNDARY==
+Content-Type: text/cloud-config; charset="us-ascii"
+
+#cloud-config
+repo_update: true
+repo_upgrade: all
+
+--==BOUNDARY==
+Content-Type: text/x-shellscript; charset="us-ascii"
+
+#!/bin/bash
+mkdir -p /tmp/workspace
+# Back the workspace with the first NVMe instance store volume when the instance has one
+INSTANCE_STORE=$(ls /dev/disk/by-id/nvme-Amazon_EC2_NVMe_Instance_Storage_* 2>/dev/null | head -n 1)
+if [ -n "$INSTANCE_STORE" ]; then
+    mkfs.ext4 -F "$INSTANCE_STORE"
+    mount "$INSTANCE_STORE" /tmp/workspace
+fi
+chmod 777 /tmp/workspace
+# Reuse the transcriber image already on the instance instead of re-pulling it per job
+echo ECS_IMAGE_PULL_BEHAVIOR=prefer-cached >> /etc/ecs/ecs.config
+
+--==BOUNDARY==--
+"""
+
 class BatchStack(Stack):
     def __init__(self, scope: Construct, construct_id: str, 
                 vpc, security_group, container_stack, secrets_stack, storage_stack, **kwargs) -> None:
@@ -51,37 +80,30 @@ class BatchStack(Stack):
             roles = [self.instance_role.role_name]
         )
 
+        # Create Spot Fleet role for the GPU compute environment
+        self.spot_fleet_role = iam.Role(self, "SpotFleetRole",
+            assumed_by = iam.ServicePrincipal("spotfleet.amazonaws.com"),
+            managed_policies = [
+                iam.ManagedPolicy.from_aws_managed_policy_name("service-role/AmazonEC2SpotFleetTaggingRole")
+            ]
+        )
+
         # Create launch template for GPU instances
         self.launch_template = ec2.CfnLaunchTemplate(self, "GPULaunchTemplate",
             launch_template_data = {
                 "blockDeviceMappings": [{
                     "deviceName": "/dev/xvda",
                     "ebs": {
-                        "volumeSize": 100,
+                        # Root FS and docker images only; video scratch lives on the instance store
+                        "volumeSize": 30,
                         "volumeType": "gp3",
+                        # Raised from the 3000 IOPS / 125 MiB/s baseline so the first image pull isn't throttled
+                        "iops": 6000,
+                        "throughput": 250,
                         "deleteOnTermination": True
                     }
                 }],
-                "userData": Fn.base64(
-                    "MIME-Version: 1.0\n"
-                    "Content-Type: multipart/mixed; boundary=\"==BOUNDARY==\"\n"
-                    "\n"
-                    "--==BOUNDARY==\n"
-                    "Content-Type: text/cloud-config; charset=\"us-ascii\"\n"
-                    "\n"
-                    "#cloud-config\n"
-                    "repo_update: true\n"
-                    "repo_upgrade: all\n"
-                    "\n"
-                    "--==BOUNDARY==\n"
-                    "Content-Type: text/x-shellscript; charset=\"us-ascii\"\n"
-                    "\n"
-                    "#!/bin/bash\n"
-                    "mkdir -p /tmp/workspace\n"
-                    "chmod 777 /tmp/workspace\n"
-                    "\n"
-                    "--==BOUNDARY==--\n"
-                )
+                "userData": Fn.base64(GPU_USER_DATA)
             }
         )
 
@@ -112,13 +134,16 @@ class BatchStack(Stack):
             ]
         ))
 
+        # Resolve the private subnet ids once for all compute environments
+        private_subnet_ids = vpc.select_subnets(subnet_type = ec2.SubnetType.PRIVATE_WITH_EGRESS).subnet_ids
+
         # Add new Fargate compute environment for text analysis
         self.fargate_text_compute_env = batch.CfnComputeEnvironment(self, "FargateTextComputeEnv",
             type = "MANAGED",
             compute_resources = {
                 "type": "FARGATE",
                 "maxvCpus": 2 * 1,
-                "subnets": [subnet.subnet_id for subnet in vpc.private_subnets],
+                "subnets": private_subnet_ids,
                 "securityGroupIds": [security_group.security_group_id],
             },
             service_role = self.batch_service_role.role_arn,
@@ -130,14 +155,45 @@ class BatchStack(Stack):
             type = "MANAGED",
             compute_resources = {
                 "type": "FARGATE",
-                "maxvCpus": 2 * 4,
-                "subnets": [subnet.subnet_id for subnet in vpc.private_subnets],
+                "maxvCpus": 2 * 8,
+                "subnets": private_subnet_ids,
+                "securityGroupIds": [security_group.security_group_id],
+            },
+            service_role = self.batch_service_role.role_arn,
+            state = "ENABLED"
+        )
+
+        # Fargate Spot counterparts, preferred by both queues with on-demand as fallback
+        self.fargate_spot_text_compute_env = batch.CfnComputeEnvironment(self, "FargateSpotTextComputeEnv",
+            type = "MANAGED",
+            compute_resources = {
+                "type": "FARGATE_SPOT",
+                "maxvCpus": 2 * 1,
+                "subnets": private_subnet_ids,
                 "securityGroupIds": [security_group.security_group_id],
             },
             service_role = self.batch_service_role.role_arn,
             state = "ENABLED"
         )
 
+        self.fargate_spot_metadata_compute_env = batch.CfnComputeEnvironment(self, "FargateSpotMetadataComputeEnv",
+            type = "MANAGED",
+            compute_resources = {
+                "type": "FARGATE_SPOT",
+                "maxvCpus": 2 * 8,
+                "subnets": private_subnet_ids,
+                "securityGroupIds": [security_group.security_group_id],
+            },
+            service_role = self.batch_service_role.role_arn,
+            state = "ENABLED"
+        )
+
+        # Optional prebaked GPU AMI with the transcriber image cached, e.g. cdk deploy --context gpu_ami_id=ami-...
+        gpu_ec2_configuration = {"imageType": "ECS_AL2_NVIDIA"}
+        gpu_ami_id = self.node.try_get_context("gpu_ami_id")
+        if gpu_ami_id:
+            gpu_ec2_configuration["imageIdOverride"] = gpu_ami_id
+
         self.gpu_compute_env = batch.CfnComputeEnvironment(self, "GPUComputeEnv",
             type = "MANAGED",
             compute_resources = {
@@ -145,21 +201,19 @@ class BatchStack(Stack):
                 "maxvCpus": 4 * 1,
                 "minvCpus": 0,
                 "desiredvCpus": 0,
-                "instanceTypes": ["g4dn.xlarge"],
-                "subnets": [subnet.subnet_id for subnet in vpc.public_subnets],
+                # Single-GPU 4 vCPU / 16 GiB types across three families to widen the Spot pools
+                "instanceTypes": ["g4dn.xlarge", "g5.xlarge", "g6.xlarge"],
+                # Instances reach ECR and S3 through the NAT gateway; no public IPs needed
+                "subnets": private_subnet_ids,
                 "instanceRole": self.instance_profile.attr_arn,
                 "securityGroupIds": [security_group.security_group_id],
-                "allocationStrategy": "SPOT_CAPACITY_OPTIMIZED",
+                "allocationStrategy": "SPOT_PRICE_CAPACITY_OPTIMIZED",
                 "launchTemplate": {
                     "launchTemplateId": self.launch_template.ref,
                     "version": "$Latest"
                 },
-                "spotIamFleetRole": iam.Role(self, "SpotFleetRole",
-                    assumed_by = iam.ServicePrincipal("spotfleet.amazonaws.com"),
-                    managed_policies = [
-                        iam.ManagedPolicy.from_aws_managed_policy_name("service-role/AmazonEC2SpotFleetTaggingRole")
-                    ]
-                ).role_arn
+                "ec2Configuration": [gpu_ec2_configuration],
+                "spotIamFleetRole": self.spot_fleet_role.role_arn
             },
             service_role = self.batch_service_role.role_arn,
             state = "ENABLED"
@@ -167,20 +221,32 @@ class BatchStack(Stack):
 
         # Add new queue for text analysis
         self.fargate_text_queue = batch.CfnJobQueue(self, "FargateTextJobQueue",
-            compute_environment_order = [{
-                "computeEnvironment": self.fargate_text_compute_env.ref,
-                "order": 1
-            }],
+            compute_environment_order = [
+                {
+                    "computeEnvironment": self.fargate_spot_text_compute_env.ref,
+                    "order": 1
+                },
+                {
+                    "computeEnvironment": self.fargate_text_compute_env.ref,
+                    "order": 2
+                }
+            ],
             priority = 1,
             job_queue_name = "tiktok-text-fargate-queue"
         )
 
         # Add new queue for metadata
         self.fargate_metadata_queue = batch.CfnJobQueue(self, "FargateMetadataJobQueue",
-            compute_environment_order = [{
-                "computeEnvironment": self.fargate_metadata_compute_env.ref,
-                "order": 1
-            }],
+            compute_environment_order = [
+                {
+                    "computeEnvironment": self.fargate_spot_metadata_compute_env.ref,
+                    "order": 1
+                },
+                {
+                    "computeEnvironment": self.fargate_metadata_compute_env.ref,
+                    "order": 2
+                }
+            ],
             priority = 1,
             job_queue_name = "tiktok-metadata-fargate-queue"
         )
@@ -202,16 +268,20 @@ class BatchStack(Stack):
                 "image": container_stack.metadata_repo_uri,
                 "command": ["python3", "main.py"],
                 "resourceRequirements": [
-                    {"type": "VCPU", "value": "2"},
-                    {"type": "MEMORY", "value": "4096"}
+                    {"type": "VCPU", "value": "0.5"},
+                    {"type": "MEMORY", "value": "1024"}
                 ],
                 "executionRoleArn": self.fargate_execution_role.role_arn,
                 "jobRoleArn": self.fargate_task_role.role_arn,
                 "networkConfiguration": {
-                    "assignPublicIp": "ENABLED"
+                    "assignPublicIp": "DISABLED"
                 }
             },
             job_definition_name = "tiktok-metadata-job",
+            # Retry jobs reclaimed by Fargate Spot; reruns are safe since each job writes a new partition
+            retry_strategy = {
+                "attempts": 3
+            },
             timeout = {
                 "attemptDurationSeconds": 60 * 60 * 6
             }
@@ -225,8 +295,12 @@ class BatchStack(Stack):
                 "resourceRequirements": [
                     {"type": "GPU", "value": "1"},
                     {"type": "VCPU", "value": "4"},
-                    {"type": "MEMORY", "value": "8000"}
+                    {"type": "MEMORY", "value": "4096"}
                 ],
+                # Docker's 64 MB /dev/shm default is too small for torch/ffmpeg shared buffers
+                "linuxParameters": {
+                    "sharedMemorySize": 2048
+                },
                 "mountPoints": [{
                     "sourceVolume": "workspace",
                     "containerPath": "/workspace",
@@ -256,16 +330,20 @@ class BatchStack(Stack):
                     "value": secrets_stack.openai_secret_arn
                 }],
                 "resourceRequirements": [
-                    {"type": "VCPU", "value": "2"},
-                    {"type": "MEMORY", "value": "4096"}
+                    {"type": "VCPU", "value": "0.5"},
+                    {"type": "MEMORY", "value": "1024"}
                 ],
                 "executionRoleArn": self.fargate_execution_role.role_arn,
                 "jobRoleArn": self.fargate_task_role.role_arn,
                 "networkConfiguration": {
-                    "assignPublicIp": "ENABLED"
+                    "assignPublicIp": "DISABLED"
                 }
             },
             job_definition_name = "tiktok-text-analysis-job",
+            # Retry jobs reclaimed by Fargate Spot; reruns are safe since each job writes a new partition
+            retry_strategy = {
+                "attempts": 3
+            },
             timeout = {
                 "attemptDurationSeconds": 60 * 60 * 2
             }
@@ -2,46 +2,63 @@ from aws_cdk import (
     Stack,
     aws_ecr as ecr,
     RemovalPolicy,
-    CfnOutput
+    CfnOutput,
+    Duration
 )
 from constructs import Construct
 
+# Release-tagged images kept per repository; a pinned digest must be among these
+RELEASE_IMAGES_KEPT = 50
+
 class ContainerStack(Stack):
     def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
+        # Expire untagged images after a week and keep the last 5 of everything else for rollbacks and layer reuse
+        # Build scripts also push a release-<timestamp> tag; an image matched by a higher-priority rule is never
+        # expired by a lower one, so release images (the digests pinned via *_image_digest context) are only
+        # expired once more than RELEASE_IMAGES_KEPT newer releases exist
+        lifecycle_rules = [
+            ecr.LifecycleRule(
+                rule_priority = 1,
+                tag_status = ecr.TagStatus.UNTAGGED,
+                max_image_age = Duration.days(7),
+                description = "Expire untagged images after 7 days"
+            ),
+            ecr.LifecycleRule(
+                rule_priority = 2,
+                tag_status = ecr.TagStatus.TAGGED,
+                tag_prefix_list = ["release-"],
+                max_image_count = RELEASE_IMAGES_KEPT,
+                description = f"Keep the {RELEASE_IMAGES_KEPT} most recent release images"
+            ),
+            ecr.LifecycleRule(
+                rule_priority = 3,
+                max_image_count = 5,
+                description = "Keep the 5 most recent other images"
+            )
+        ]
+
         # Create ECR Repositories
         self.metadata_repository = ecr.Repository(self, "TiktokMetadataRepo",
             repository_name = "tiktok-metadata",
             removal_policy = RemovalPolicy.DESTROY,
-            lifecycle_rules = [
-                ecr.LifecycleRule(
-                    max_image_count = 1,
-                    description = "Keep only latest image"
-                )
-            ]
+            image_scan_on_push = True,
+            lifecycle_rules = lifecycle_rules
         )
 
         self.transcription_repository = ecr.Repository(self, "TiktokTranscriberRepo",
             repository_name = "tiktok-transcriber",
             removal_policy = RemovalPolicy.DESTROY,
-            lifecycle_rules = [
-                ecr.LifecycleRule(
-                    max_image_count = 1,
-                    description = "Keep only latest image"
-                )
-            ]
+            image_scan_on_push = True,
+            lifecycle_rules = lifecycle_rules
         )
 
         self.text_analysis_repository = ecr.Repository(self, "TiktokTextAnalysisRepo",
             repository_name = "tiktok-text-analysis",
             removal_policy = RemovalPolicy.DESTROY,
-            lifecycle_rules = [
-                ecr.LifecycleRule(
-                    max_image_count = 1,
-                    description = "Keep only latest image"
-                )
-            ]
+            image_scan_on_push = True,
+            lifecycle_rules = lifecycle_rules
         )
 
         # Outputs
@@ -63,17 +80,25 @@ class ContainerStack(Stack):
             export_name = "TiktokTextAnalysisRepoUri"
         )
 
+    def _image_uri(self, repository: ecr.Repository, digest_context_key: str) -> str:
+        """Get the image reference for a repository, pinned to a digest when one is passed as context"""
+        # e.g. cdk deploy --context transcriber_image_digest=<sha256 hex>
+        digest = self.node.try_get_context(digest_context_key)
+        if digest:
+            return f"{repository.repository_uri}@sha256:{digest.removeprefix('sha256:')}"
+        return f"{repository.repository_uri}:latest"
+
     @property
     def metadata_repo_uri(self) -> str:
-        """Get the URI of the metadata repository"""
-        return self.metadata_repository.repository_uri
+        """Get the image URI of the metadata repository"""
+        return self._image_uri(self.metadata_repository, "metadata_image_digest")
 
     @property
     def transcriber_repo_uri(self) -> str:
-        """Get the URI of the transcriber repository"""
-        return self.transcription_repository.repository_uri
+        """Get the image URI of the transcriber repository"""
+        return self._image_uri(self.transcription_repository, "transcriber_image_digest")
 
     @property
     def text_analysis_repo_uri(self) -> str:
-        """Get the URI of the text analysis repository"""
-        return self.text_analysis_repository.repository_uri 
\ No newline at end of file
+        """Get the image URI of the text analysis repository"""
+        return self._image_uri(self.text_analysis_repository, "text_analysis_image_digest") 
\ No newline at end of file
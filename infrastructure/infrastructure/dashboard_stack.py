@@ -1,12 +1,6 @@
 from aws_cdk import (
     Stack,
-    aws_ec2 as ec2,
     aws_iam as iam,
-    aws_glue as glue,
-    aws_secretsmanager as secretsmanager,
-    aws_ssm as ssm,
-    aws_lambda as lambda_,
-    Duration,
     CfnOutput
 )
 from constructs import Construct
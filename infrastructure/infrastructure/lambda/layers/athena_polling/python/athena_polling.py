@@ -0,0 +1,36 @@
+import os
+import random
+import time
+
+# Polling delays and overall limit for Athena queries (seconds)
+POLL_INITIAL_DELAY = float(os.environ.get("ATHENA_POLL_DELAY", 0.5))
+POLL_MAX_DELAY = 5
+POLL_TIMEOUT = float(os.environ.get("ATHENA_POLL_TIMEOUT", 30))
+# Time kept back from each Lambda invocation for reporting results (seconds)
+INVOCATION_RESERVE = 5
+
+def wait_for_query(athena, query_execution_id: str, timeout: float = POLL_TIMEOUT) -> str:
+    """
+    Poll an Athena query with exponential backoff until it finishes.
+    Returns the terminal state; raises TimeoutError if the query is still running after timeout seconds.
+    """
+    deadline = time.monotonic() + timeout
+    attempt = 0
+    while True:
+        query_status = athena.get_query_execution(
+            QueryExecutionId = query_execution_id
+        )['QueryExecution']['Status']['State']
+
+        if query_status in ['SUCCEEDED', 'FAILED', 'CANCELLED']:
+            return query_status
+
+        # Back off with jitter to avoid GetQueryExecution throttling
+        delay = min(POLL_INITIAL_DELAY * (1.5 ** attempt) + random.uniform(0, 0.5), POLL_MAX_DELAY)
+        if time.monotonic() + delay > deadline:
+            raise TimeoutError(f"Athena query {query_execution_id} still {query_status} after {timeout:.0f}s")
+        time.sleep(delay)
+        attempt += 1
+
+def remaining_poll_timeout(context) -> float:
+    """Polling budget left in a Lambda invocation, capped at POLL_TIMEOUT (zero or less once it is used up)."""
+    return min(POLL_TIMEOUT, context.get_remaining_time_in_millis() / 1000 - INVOCATION_RESERVE)
@@ -4,13 +4,16 @@ import boto3
 import logging
 import re
 import hashlib
+from botocore.config import Config
+from typing import Optional
 from urllib.parse import unquote
+from athena_polling import wait_for_query, remaining_poll_timeout  # Provided by the shared athena_polling layer
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 batch = boto3.client('batch')
-athena = boto3.client('athena')
+athena = boto3.client('athena', config = Config(retries = {'max_attempts': 10, 'mode': 'adaptive'}))
 
 def create_valid_job_name(key: str) -> str:
     """Create a valid job name from S3 key."""
@@ -38,8 +41,20 @@ def create_valid_job_name(key: str) -> str:
     
     return f"transcribe-{clean_name}-{hash_suffix}"
 
-def add_partition(bucket: str, key: str) -> None:
-    """Add partition to Glue table for the uploaded file."""
+def find_submitted_job(job_name: str) -> Optional[str]:
+    """Return the ID of a job already submitted under this name that has not failed, if any."""
+    # Filtering by name returns jobs in every status
+    jobs = batch.list_jobs(
+        jobQueue = os.environ['GPU_JOB_QUEUE'],
+        filters = [{'name': 'JOB_NAME', 'values': [job_name]}]
+    )['jobSummaryList']
+    for job in jobs:
+        if job['status'] != 'FAILED':
+            return job['jobId']
+    return None
+
+def add_partition(bucket: str, key: str, timeout: float) -> None:
+    """Add partition to Glue table for the uploaded file, waiting at most timeout seconds."""
     try:
         # Extract partition values from the key
         partition_pattern = re.compile(r'profile=([^/]+)/processed_at=([^/]+)/')
@@ -74,67 +89,73 @@ def add_partition(bucket: str, key: str) -> None:
         )
         
         # Wait for query to complete
-        query_execution_id = response['QueryExecutionId']
-        while True:
-            query_status = athena.get_query_execution(
-                QueryExecutionId=query_execution_id
-            )['QueryExecution']['Status']['State']
-            
-            if query_status in ['SUCCEEDED', 'FAILED', 'CANCELLED']:
-                break
-                
+        query_status = wait_for_query(athena, response['QueryExecutionId'], timeout)
         if query_status != 'SUCCEEDED':
             logger.error(f"Failed to add partition: {query_status}")
             
+    except TimeoutError:
+        # Let the message fail so SQS redelivers it once Athena catches up
+        raise
     except Exception as e:
         logger.error(f"Error adding partition: {str(e)}")
 
-def handler(event, context):
-    try:
-        # Process each record in the event
-        for record in event['Records']:
-            # Get the S3 event from the SNS message
-            sns_message = record['Sns']['Message']
-            s3_event = json.loads(sns_message)
-            
-            # Process each S3 record
-            for s3_record in s3_event['Records']:
-                bucket = s3_record['s3']['bucket']['name']
-                key = s3_record['s3']['object']['key']
-                
-                # Decode the key for logging
-                decoded_key = unquote(key)
-                logger.info(f"Processing new metadata upload - Bucket: {bucket}, Key: {decoded_key}")
-                
-                # Submit the transcription batch job
-                response = batch.submit_job(
-                    jobName = create_valid_job_name(key),
-                    jobQueue = os.environ['GPU_JOB_QUEUE'],
-                    jobDefinition = os.environ['TRANSCRIBER_JOB_DEFINITION'],
-                    containerOverrides = {
-                        'environment': [
-                            {
-                                'name': 'METADATA_S3_KEY',
-                                'value': decoded_key
-                            },
-                            {
-                                'name': 'S3_BUCKET',
-                                'value': bucket
-                            }
-                        ]
-                    }
-                )
-                
-                # Add partition for the uploaded file
-                add_partition(bucket, decoded_key)
-                
-                logger.info(f"Submitted transcription job {response['jobName']} with ID {response['jobId']}")
+def process_record(record: dict, context) -> None:
+    """Handle one SQS message carrying an S3 event notification."""
+    # Get the S3 event from the SQS message (raw SNS delivery)
+    s3_event = json.loads(record['body'])
+    
+    # Process each S3 record (s3:TestEvent messages have none)
+    for s3_record in s3_event.get('Records', []):
+        bucket = s3_record['s3']['bucket']['name']
+        key = s3_record['s3']['object']['key']
         
-        return {
-            'statusCode': 200,
-            'body': 'Successfully processed all metadata files'
-        }
+        # Decode the key for logging
+        decoded_key = unquote(key)
+        logger.info(f"Processing new metadata upload - Bucket: {bucket}, Key: {decoded_key}")
         
-    except Exception as e:
-        logger.error(f"Error processing SNS event: {str(e)}")
-        raise 
\ No newline at end of file
+        # Register the partition first: a timeout here fails the message before any job is submitted
+        add_partition(bucket, decoded_key, remaining_poll_timeout(context))
+        
+        # The job name is derived from the key, so a redelivered message finds the job it already submitted
+        job_name = create_valid_job_name(key)
+        existing_job_id = find_submitted_job(job_name)
+        if existing_job_id:
+            logger.info(f"Transcription job {job_name} already submitted with ID {existing_job_id}, skipping")
+            continue
+        
+        # Submit the transcription batch job
+        response = batch.submit_job(
+            jobName = job_name,
+            jobQueue = os.environ['GPU_JOB_QUEUE'],
+            jobDefinition = os.environ['TRANSCRIBER_JOB_DEFINITION'],
+            containerOverrides = {
+                'environment': [
+                    {
+                        'name': 'METADATA_S3_KEY',
+                        'value': decoded_key
+                    },
+                    {
+                        'name': 'S3_BUCKET',
+                        'value': bucket
+                    }
+                ]
+            }
+        )
+        
+        logger.info(f"Submitted transcription job {response['jobName']} with ID {response['jobId']}")
+
+def handler(event, context):
+    # Report failed messages individually so SQS only redelivers those, not the whole batch
+    batch_item_failures = []
+    for record in event['Records']:
+        # Hand back messages there is no time left for instead of letting the whole batch time out
+        if remaining_poll_timeout(context) <= 0:
+            batch_item_failures.append({'itemIdentifier': record['messageId']})
+            continue
+        try:
+            process_record(record, context)
+        except Exception as e:
+            logger.error(f"Error processing SQS message {record['messageId']}: {str(e)}")
+            batch_item_failures.append({'itemIdentifier': record['messageId']})
+    
+    return {'batchItemFailures': batch_item_failures}
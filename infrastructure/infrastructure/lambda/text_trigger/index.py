@@ -2,17 +2,19 @@ import json
 import boto3
 import logging
 import os
+from botocore.config import Config
 from urllib.parse import unquote
+from athena_polling import wait_for_query, remaining_poll_timeout  # Provided by the shared athena_polling layer
 import re
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger()
 
-athena = boto3.client('athena')
+athena = boto3.client('athena', config = Config(retries = {'max_attempts': 10, 'mode': 'adaptive'}))
 
-def add_partition(bucket: str, key: str) -> None:
-    """Add partition to Glue table for the uploaded file."""
+def add_partition(bucket: str, key: str, timeout: float) -> None:
+    """Add partition to Glue table for the uploaded file, waiting at most timeout seconds."""
     try:
         # Extract partition values from the key
         partition_pattern = re.compile(r'profile=([^/]+)/processed_at=([^/]+)/')
@@ -47,46 +49,45 @@ def add_partition(bucket: str, key: str) -> None:
         )
         
         # Wait for query to complete
-        query_execution_id = response['QueryExecutionId']
-        while True:
-            query_status = athena.get_query_execution(
-                QueryExecutionId = query_execution_id
-            )['QueryExecution']['Status']['State']
-            
-            if query_status in ['SUCCEEDED', 'FAILED', 'CANCELLED']:
-                break
-                
+        query_status = wait_for_query(athena, response['QueryExecutionId'], timeout)
         if query_status != 'SUCCEEDED':
             logger.error(f"Failed to add partition: {query_status}")
             
+    except TimeoutError:
+        # Let the message fail so SQS redelivers it once Athena catches up
+        raise
     except Exception as e:
         logger.error(f"Error adding partition: {str(e)}")
 
-def handler(event, context):
-    try:
-        # Process each record in the event
-        for record in event['Records']:
-            # Get the S3 event from the SNS message
-            sns_message = record['Sns']['Message']
-            s3_event = json.loads(sns_message)
-            
-            # Process each S3 record
-            for s3_record in s3_event['Records']:
-                bucket = s3_record['s3']['bucket']['name']
-                key = s3_record['s3']['object']['key']
-                
-                # Decode the key for logging
-                decoded_key = unquote(key)
-                logger.info(f"Processing new text analysis upload - Bucket: {bucket}, Key: {decoded_key}")
-                
-                # Add partition for the uploaded file
-                add_partition(bucket, decoded_key)
+def process_record(record: dict, context) -> None:
+    """Handle one SQS message carrying an S3 event notification."""
+    # Get the S3 event from the SQS message (raw SNS delivery)
+    s3_event = json.loads(record['body'])
+    
+    # Process each S3 record (s3:TestEvent messages have none)
+    for s3_record in s3_event.get('Records', []):
+        bucket = s3_record['s3']['bucket']['name']
+        key = s3_record['s3']['object']['key']
         
-        return {
-            'statusCode': 200,
-            'body': 'Successfully processed all text analysis files'
-        }
+        # Decode the key for logging
+        decoded_key = unquote(key)
+        logger.info(f"Processing new text analysis upload - Bucket: {bucket}, Key: {decoded_key}")
         
-    except Exception as e:
-        logger.error(f"Error processing SNS event: {str(e)}")
-        raise 
\ No newline at end of file
+        # Add partition for the uploaded file
+        add_partition(bucket, decoded_key, remaining_poll_timeout(context))
+
+def handler(event, context):
+    # Report failed messages individually so SQS only redelivers those, not the whole batch
+    batch_item_failures = []
+    for record in event['Records']:
+        # Hand back messages there is no time left for instead of letting the whole batch time out
+        if remaining_poll_timeout(context) <= 0:
+            batch_item_failures.append({'itemIdentifier': record['messageId']})
+            continue
+        try:
+            process_record(record, context)
+        except Exception as e:
+            logger.error(f"Error processing SQS message {record['messageId']}: {str(e)}")
+            batch_item_failures.append({'itemIdentifier': record['messageId']})
+    
+    return {'batchItemFailures': batch_item_failures}
@@ -24,9 +24,28 @@ class NetworkStack(Stack):
                     subnet_type = ec2.SubnetType.PRIVATE_WITH_EGRESS,
                     cidr_mask = 24
                 )
-            ]
+            ],
+            # S3 traffic from the private subnets bypasses the NAT gateway
+            gateway_endpoints = {
+                "S3": ec2.GatewayVpcEndpointOptions(
+                    service = ec2.GatewayVpcEndpointAwsService.S3
+                )
+            }
         )
 
+        # Interface endpoints for image pulls, secrets and logs from the private subnets
+        # Each gets a security group allowing HTTPS from within the VPC
+        for endpoint_id, service in [
+            ("EcrEndpoint", ec2.InterfaceVpcEndpointAwsService.ECR),
+            ("EcrDockerEndpoint", ec2.InterfaceVpcEndpointAwsService.ECR_DOCKER),
+            ("SecretsManagerEndpoint", ec2.InterfaceVpcEndpointAwsService.SECRETS_MANAGER),
+            ("CloudWatchLogsEndpoint", ec2.InterfaceVpcEndpointAwsService.CLOUDWATCH_LOGS)
+        ]:
+            self.vpc.add_interface_endpoint(endpoint_id,
+                service = service,
+                subnets = ec2.SubnetSelection(subnet_type = ec2.SubnetType.PRIVATE_WITH_EGRESS)
+            )
+
         # Create security group for compute environments
         self.batch_security_group = ec2.SecurityGroup(self, "BatchSecurityGroup",
             vpc = self.vpc,
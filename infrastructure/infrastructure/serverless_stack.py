@@ -2,6 +2,8 @@ from aws_cdk import (
     Stack,
     aws_lambda as lambda_,
     aws_sns_subscriptions as subscriptions,
+    aws_sqs as sqs,
+    aws_lambda_event_sources as event_sources,
     aws_iam as iam,
     Duration,
     CfnOutput
@@ -19,11 +21,22 @@ class ServerlessStack(Stack):
             "S3_BUCKET": storage_stack.bucket_name
         }
 
+        # Shared Athena polling helper for the triggers that add partitions
+        self.athena_polling_layer = lambda_.LayerVersion(self, "AthenaPollingLayer",
+            code = lambda_.Code.from_asset("infrastructure/lambda/layers/athena_polling"),
+            compatible_runtimes = [lambda_.Runtime.PYTHON_3_12],
+            compatible_architectures = [lambda_.Architecture.ARM_64],
+            description = "Athena query polling with backoff and timeout"
+        )
+
         # Create Lambda function for metadata trigger
         self.metadata_trigger = lambda_.Function(self, "MetadataTriggerFunction",
-            runtime = lambda_.Runtime.PYTHON_3_9,
+            runtime = lambda_.Runtime.PYTHON_3_12,
+            architecture = lambda_.Architecture.ARM_64,
+            tracing = lambda_.Tracing.ACTIVE,
             handler = "index.handler",
             code = lambda_.Code.from_asset("infrastructure/lambda/metadata_trigger"),
+            layers = [self.athena_polling_layer],
             environment = {
                 **common_env,
                 "GPU_JOB_QUEUE": batch_stack.gpu_queue.job_queue_name,
@@ -35,7 +48,9 @@ class ServerlessStack(Stack):
 
         # Create Lambda function for transcript trigger
         self.transcript_trigger = lambda_.Function(self, "TranscriptTriggerFunction",
-            runtime = lambda_.Runtime.PYTHON_3_9,
+            runtime = lambda_.Runtime.PYTHON_3_12,
+            architecture = lambda_.Architecture.ARM_64,
+            tracing = lambda_.Tracing.ACTIVE,
             handler = "index.handler",
             code = lambda_.Code.from_asset("infrastructure/lambda/transcript_trigger"),
             environment = {
@@ -49,98 +64,124 @@ class ServerlessStack(Stack):
 
         # Create Lambda function for text trigger
         self.text_trigger = lambda_.Function(self, "TextTriggerFunction",
-            runtime = lambda_.Runtime.PYTHON_3_9,
+            runtime = lambda_.Runtime.PYTHON_3_12,
+            architecture = lambda_.Architecture.ARM_64,
+            tracing = lambda_.Tracing.ACTIVE,
             handler = "index.handler",
             code = lambda_.Code.from_asset("infrastructure/lambda/text_trigger"),
+            layers = [self.athena_polling_layer],
             environment = common_env,
             timeout = Duration.minutes(5),
             function_name = "tiktok-text-trigger"
         )
 
-        # Subscribe Lambda functions to SNS topics
-        storage_stack.metadata_topic.add_subscription(
-            subscriptions.LambdaSubscription(self.metadata_trigger)
+        # Buffer SNS notifications in SQS so bursts of uploads reach each Lambda in batches
+        # Visibility timeouts are 6x the function timeout, as recommended for SQS event sources
+        # Messages that keep failing move to a dead-letter queue instead of looping until retention expires
+        self.trigger_dead_letter_queue = sqs.Queue(self, "TriggerDeadLetterQueue",
+            retention_period = Duration.days(14)
+        )
+        dead_letter_queue = sqs.DeadLetterQueue(
+            queue = self.trigger_dead_letter_queue,
+            max_receive_count = 3
+        )
+
+        self.metadata_queue = sqs.Queue(self, "MetadataTriggerQueue",
+            visibility_timeout = Duration.minutes(6),
+            dead_letter_queue = dead_letter_queue
         )
 
-        storage_stack.transcript_topic.add_subscription(
-            subscriptions.LambdaSubscription(self.transcript_trigger)
+        self.transcript_queue = sqs.Queue(self, "TranscriptTriggerQueue",
+            visibility_timeout = Duration.minutes(6),
+            dead_letter_queue = dead_letter_queue
         )
 
-        storage_stack.text_topic.add_subscription(
-            subscriptions.LambdaSubscription(self.text_trigger)
+        self.text_queue = sqs.Queue(self, "TextTriggerQueue",
+            visibility_timeout = Duration.minutes(30),
+            dead_letter_queue = dead_letter_queue
         )
 
-        # Add permissions for all functions
-        for function in [self.metadata_trigger, self.transcript_trigger, self.text_trigger]:
-            function.add_to_role_policy(iam.PolicyStatement(
-                effect = iam.Effect.ALLOW,
-                actions = [
-                    "s3:GetObject",
-                    "s3:PutObject",
-                    "s3:ListBucket",
-                    "s3:GetBucketLocation"
-                ],
-                resources = [
-                    storage_stack.bucket_arn,
-                    f"{storage_stack.bucket_arn}/*"
-                ]
+        # Subscribe queues to SNS topics and feed them to the Lambda functions
+        for topic, queue, function in [
+            (storage_stack.metadata_topic, self.metadata_queue, self.metadata_trigger),
+            (storage_stack.transcript_topic, self.transcript_queue, self.transcript_trigger),
+            (storage_stack.text_topic, self.text_queue, self.text_trigger)
+        ]:
+            # Raw delivery puts the S3 event JSON directly in the message body
+            topic.add_subscription(
+                subscriptions.SqsSubscription(queue, raw_message_delivery = True)
+            )
+            function.add_event_source(event_sources.SqsEventSource(queue,
+                batch_size = 10,
+                max_batching_window = Duration.seconds(5),
+                # Handlers return batchItemFailures so only the failed messages are retried
+                report_batch_item_failures = True
             ))
 
-        # Add specific permissions for metadata trigger
-        self.metadata_trigger.add_to_role_policy(iam.PolicyStatement(
-            effect = iam.Effect.ALLOW,
-            actions = [
-                "batch:SubmitJob",
-                "athena:StartQueryExecution",
-                "athena:GetQueryExecution",
-                "athena:GetWorkGroup",
-                "glue:GetDatabase",
-                "glue:GetTable",
-                "glue:GetPartition",
-                "glue:GetPartitions",
-                "glue:BatchCreatePartition"
-            ],
-            resources = [
-                f"arn:aws:batch:{Stack.of(self).region}:{Stack.of(self).account}:job-queue/{batch_stack.gpu_queue.job_queue_name}",
-                f"arn:aws:batch:{Stack.of(self).region}:{Stack.of(self).account}:job-definition/{batch_stack.transcription_job.job_definition_name}:*",
-                f"arn:aws:glue:{Stack.of(self).region}:{Stack.of(self).account}:catalog",
-                f"arn:aws:glue:{Stack.of(self).region}:{Stack.of(self).account}:database/tiktok_analytics",
-                f"arn:aws:glue:{Stack.of(self).region}:{Stack.of(self).account}:table/tiktok_analytics/*",
-                "*"  # For Athena permissions
+        # One managed policy shared by all trigger functions instead of an inline policy per call
+        region, account = Stack.of(self).region, Stack.of(self).account
+        self.trigger_policy = iam.ManagedPolicy(self, "TikTokLambdaPolicy",
+            statements = [
+                iam.PolicyStatement(
+                    effect = iam.Effect.ALLOW,
+                    actions = [
+                        "s3:GetObject",
+                        "s3:PutObject",
+                        "s3:ListBucket",
+                        "s3:GetBucketLocation"
+                    ],
+                    resources = [
+                        storage_stack.bucket_arn,
+                        f"{storage_stack.bucket_arn}/*"
+                    ]
+                ),
+                iam.PolicyStatement(
+                    effect = iam.Effect.ALLOW,
+                    actions = [
+                        "athena:StartQueryExecution",
+                        "athena:GetQueryExecution",
+                        "athena:GetWorkGroup"
+                    ],
+                    resources = [f"arn:aws:athena:{region}:{account}:workgroup/primary"]
+                ),
+                iam.PolicyStatement(
+                    effect = iam.Effect.ALLOW,
+                    actions = [
+                        "glue:GetDatabase",
+                        "glue:GetTable",
+                        "glue:GetPartition",
+                        "glue:GetPartitions",
+                        "glue:BatchCreatePartition"
+                    ],
+                    resources = [
+                        f"arn:aws:glue:{region}:{account}:catalog",
+                        f"arn:aws:glue:{region}:{account}:database/tiktok_analytics",
+                        f"arn:aws:glue:{region}:{account}:table/tiktok_analytics/*"
+                    ]
+                ),
+                # ListJobs has no resource-level permissions; the metadata trigger uses it to skip resubmitting jobs
+                iam.PolicyStatement(
+                    effect = iam.Effect.ALLOW,
+                    actions = ["batch:ListJobs"],
+                    resources = ["*"]
+                ),
+                iam.PolicyStatement(
+                    effect = iam.Effect.ALLOW,
+                    actions = ["batch:SubmitJob"],
+                    resources = [
+                        f"arn:aws:batch:{region}:{account}:job-queue/{batch_stack.gpu_queue.job_queue_name}",
+                        f"arn:aws:batch:{region}:{account}:job-queue/{batch_stack.fargate_text_queue.job_queue_name}",
+                        f"arn:aws:batch:{region}:{account}:job-definition/{batch_stack.transcription_job.job_definition_name}",
+                        f"arn:aws:batch:{region}:{account}:job-definition/{batch_stack.transcription_job.job_definition_name}:*",
+                        f"arn:aws:batch:{region}:{account}:job-definition/{batch_stack.text_analysis_job.job_definition_name}",
+                        f"arn:aws:batch:{region}:{account}:job-definition/{batch_stack.text_analysis_job.job_definition_name}:*"
+                    ]
+                )
             ]
-        ))
-
-        # Add specific permissions for transcript trigger
-        self.transcript_trigger.add_to_role_policy(iam.PolicyStatement(
-            effect = iam.Effect.ALLOW,
-            actions = ["batch:SubmitJob"],
-            resources = [
-                f"arn:aws:batch:{Stack.of(self).region}:{Stack.of(self).account}:job-queue/{batch_stack.fargate_text_queue.job_queue_name}",
-                f"arn:aws:batch:{Stack.of(self).region}:{Stack.of(self).account}:job-definition/{batch_stack.text_analysis_job.job_definition_name}:*",
-                f"arn:aws:batch:{Stack.of(self).region}:{Stack.of(self).account}:job-definition/*"
-            ]
-        ))
-
-        # Add specific permissions for text trigger
-        self.text_trigger.add_to_role_policy(iam.PolicyStatement(
-            effect = iam.Effect.ALLOW,
-            actions = [
-                "athena:StartQueryExecution",
-                "athena:GetQueryExecution",
-                "athena:GetWorkGroup",
-                "glue:GetDatabase",
-                "glue:GetTable",
-                "glue:GetPartition",
-                "glue:GetPartitions",
-                "glue:BatchCreatePartition"
-            ],
-            resources = [
-                f"arn:aws:glue:{Stack.of(self).region}:{Stack.of(self).account}:catalog",
-                f"arn:aws:glue:{Stack.of(self).region}:{Stack.of(self).account}:database/tiktok_analytics",
-                f"arn:aws:glue:{Stack.of(self).region}:{Stack.of(self).account}:table/tiktok_analytics/*",
-                "*"  # For Athena permissions
-            ]
-        ))
+        )
+
+        for function in [self.metadata_trigger, self.transcript_trigger, self.text_trigger]:
+            function.role.add_managed_policy(self.trigger_policy)
 
         # Outputs
         CfnOutput(self, "MetadataTriggerArn",
@@ -159,4 +200,9 @@ class ServerlessStack(Stack):
             value = self.text_trigger.function_arn,
             description = "The ARN of the text trigger function",
             export_name = "TiktokTextTriggerArn"
-        ) 
\ No newline at end of file
+        ) 
+        CfnOutput(self, "TriggerDeadLetterQueueUrl",
+            value = self.trigger_dead_letter_queue.queue_url,
+            description = "The URL of the dead-letter queue for failed trigger messages",
+            export_name = "TiktokTriggerDeadLetterQueueUrl"
+        )
@@ -3,11 +3,9 @@ from aws_cdk import (
     aws_s3 as s3,
     aws_s3_notifications as s3n,
     aws_sns as sns,
-    aws_sns_subscriptions as subscriptions,
     aws_glue as glue,
     RemovalPolicy,
-    CfnOutput,
-    Duration
+    CfnOutput
 )
 from constructs import Construct
 
@@ -72,7 +70,8 @@ class StorageStack(Stack):
                 parameters = {
                     "classification": "parquet",
                     "has_encrypted_data": "false",
-                    "EXTERNAL": "TRUE"
+                    "EXTERNAL": "TRUE",
+                    "parquet.compression": "ZSTD"
                 },
                 storage_descriptor = glue.CfnTable.StorageDescriptorProperty(
                     location = f"s3://{self.bucket.bucket_name}/videos/metadata",
@@ -117,7 +116,8 @@ class StorageStack(Stack):
                 parameters = {
                     "classification": "parquet",
                     "has_encrypted_data": "false",
-                    "EXTERNAL": "TRUE"
+                    "EXTERNAL": "TRUE",
+                    "parquet.compression": "ZSTD"
                 },
                 storage_descriptor = glue.CfnTable.StorageDescriptorProperty(
                     location = f"s3://{self.bucket.bucket_name}/videos/text",
@@ -0,0 +1,40 @@
+import aws_cdk as core
+import pytest
+
+from infrastructure.storage_stack import StorageStack
+from infrastructure.secrets_stack import SecretsStack
+from infrastructure.network_stack import NetworkStack
+from infrastructure.container_stack import ContainerStack
+from infrastructure.batch_stack import BatchStack
+from infrastructure.serverless_stack import ServerlessStack
+
+# Synthesize the pipeline stacks once, wired together as in app.py
+@pytest.fixture(scope = "session")
+def stacks():
+    app = core.App()
+    env = core.Environment(account = "123456789012", region = "us-east-1")
+
+    storage_stack = StorageStack(app, "TiktokStorageStack", bucket_name = "tiktoktrends-test", env = env)
+    secrets_stack = SecretsStack(app, "TiktokSecretsStack", env = env)
+    network_stack = NetworkStack(app, "TiktokNetworkStack", env = env)
+    container_stack = ContainerStack(app, "TiktokContainerStack", env = env)
+    batch_stack = BatchStack(app, "TiktokBatchStack",
+        vpc = network_stack.vpc,
+        security_group = network_stack.batch_security_group,
+        container_stack = container_stack,
+        secrets_stack = secrets_stack,
+        storage_stack = storage_stack,
+        env = env
+    )
+    serverless_stack = ServerlessStack(app, "TiktokServerlessStack",
+        storage_stack = storage_stack,
+        batch_stack = batch_stack,
+        env = env
+    )
+
+    return {
+        "network": network_stack,
+        "container": container_stack,
+        "batch": batch_stack,
+        "serverless": serverless_stack
+    }
@@ -0,0 +1,60 @@
+import aws_cdk.assertions as assertions
+
+def test_fargate_queues_prefer_spot_compute_environments(stacks):
+    template = assertions.Template.from_stack(stacks["batch"])
+    batch_stack = stacks["batch"]
+
+    for queue_name, spot_env, on_demand_env in [
+        ("tiktok-text-fargate-queue", batch_stack.fargate_spot_text_compute_env, batch_stack.fargate_text_compute_env),
+        ("tiktok-metadata-fargate-queue", batch_stack.fargate_spot_metadata_compute_env, batch_stack.fargate_metadata_compute_env)
+    ]:
+        template.has_resource_properties("AWS::Batch::JobQueue", {
+            "JobQueueName": queue_name,
+            "ComputeEnvironmentOrder": [
+                {"ComputeEnvironment": {"Ref": batch_stack.get_logical_id(spot_env)}, "Order": 1},
+                {"ComputeEnvironment": {"Ref": batch_stack.get_logical_id(on_demand_env)}, "Order": 2}
+            ]
+        })
+
+    spot_envs = template.find_resources("AWS::Batch::ComputeEnvironment", {
+        "Properties": {"ComputeResources": {"Type": "FARGATE_SPOT"}}
+    })
+    assert set(spot_envs) == {
+        batch_stack.get_logical_id(batch_stack.fargate_spot_text_compute_env),
+        batch_stack.get_logical_id(batch_stack.fargate_spot_metadata_compute_env)
+    }
+
+def test_fargate_jobs_are_right_sized_and_retry_spot_reclaims(stacks):
+    template = assertions.Template.from_stack(stacks["batch"])
+
+    for job_name in ["tiktok-metadata-job", "tiktok-text-analysis-job"]:
+        template.has_resource_properties("AWS::Batch::JobDefinition", {
+            "JobDefinitionName": job_name,
+            "RetryStrategy": {"Attempts": 3},
+            "ContainerProperties": assertions.Match.object_like({
+                "ResourceRequirements": [
+                    {"Type": "VCPU", "Value": "0.5"},
+                    {"Type": "MEMORY", "Value": "1024"}
+                ]
+            })
+        })
+
+def test_gpu_queue_uses_diversified_spot_gpu_compute_environment(stacks):
+    template = assertions.Template.from_stack(stacks["batch"])
+    batch_stack = stacks["batch"]
+
+    template.has_resource_properties("AWS::Batch::ComputeEnvironment", {
+        "ComputeResources": assertions.Match.object_like({
+            "Type": "SPOT",
+            "AllocationStrategy": "SPOT_PRICE_CAPACITY_OPTIMIZED",
+            "InstanceTypes": ["g4dn.xlarge", "g5.xlarge", "g6.xlarge"],
+            "Ec2Configuration": [{"ImageType": "ECS_AL2_NVIDIA"}],
+            "SpotIamFleetRole": assertions.Match.any_value()
+        })
+    })
+    template.has_resource_properties("AWS::Batch::JobQueue", {
+        "JobQueueName": "tiktok-gpu-queue",
+        "ComputeEnvironmentOrder": [
+            {"ComputeEnvironment": {"Ref": batch_stack.get_logical_id(batch_stack.gpu_compute_env)}, "Order": 1}
+        ]
+    })
@@ -0,0 +1,37 @@
+import json
+
+import aws_cdk.assertions as assertions
+
+from infrastructure.container_stack import RELEASE_IMAGES_KEPT
+
+def test_ecr_lifecycle_rules(stacks):
+    template = assertions.Template.from_stack(stacks["container"])
+
+    repositories = template.find_resources("AWS::ECR::Repository")
+    assert len(repositories) == 3
+
+    for repository in repositories.values():
+        properties = repository["Properties"]
+        assert properties["ImageScanningConfiguration"] == {"ScanOnPush": True}
+
+        rules = json.loads(properties["LifecyclePolicy"]["LifecyclePolicyText"])["rules"]
+        assert [rule["rulePriority"] for rule in rules] == [1, 2, 3]
+        assert rules[0]["selection"] == {
+            "tagStatus": "untagged",
+            "countType": "sinceImagePushed",
+            "countNumber": 7,
+            "countUnit": "days"
+        }
+        # Release images match a higher-priority rule, so the catch-all count below never expires them
+        assert rules[1]["selection"] == {
+            "tagStatus": "tagged",
+            "tagPrefixList": ["release-"],
+            "countType": "imageCountMoreThan",
+            "countNumber": RELEASE_IMAGES_KEPT
+        }
+        assert rules[2]["selection"] == {
+            "tagStatus": "any",
+            "countType": "imageCountMoreThan",
+            "countNumber": 5
+        }
+        assert all(rule["action"] == {"type": "expire"} for rule in rules)
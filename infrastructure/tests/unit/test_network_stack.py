@@ -0,0 +1,36 @@
+import aws_cdk.assertions as assertions
+
+def test_vpc_endpoints(stacks):
+    template = assertions.Template.from_stack(stacks["network"])
+
+    gateway_endpoints = template.find_resources("AWS::EC2::VPCEndpoint", {
+        "Properties": {"VpcEndpointType": "Gateway"}
+    })
+    assert len(gateway_endpoints) == 1
+
+    interface_endpoints = template.find_resources("AWS::EC2::VPCEndpoint", {
+        "Properties": {"VpcEndpointType": "Interface", "PrivateDnsEnabled": True}
+    })
+    assert sorted(endpoint["Properties"]["ServiceName"] for endpoint in interface_endpoints.values()) == [
+        "com.amazonaws.us-east-1.ecr.api",
+        "com.amazonaws.us-east-1.ecr.dkr",
+        "com.amazonaws.us-east-1.logs",
+        "com.amazonaws.us-east-1.secretsmanager"
+    ]
+
+def test_fargate_jobs_have_no_public_ips(stacks):
+    template = assertions.Template.from_stack(stacks["batch"])
+
+    fargate_jobs = template.find_resources("AWS::Batch::JobDefinition", {
+        "Properties": {"PlatformCapabilities": ["FARGATE"]}
+    })
+    assert len(fargate_jobs) == 2
+    for job in fargate_jobs.values():
+        assert job["Properties"]["ContainerProperties"]["NetworkConfiguration"] == {"AssignPublicIp": "DISABLED"}
+
+def test_vpc_spans_two_availability_zones(stacks):
+    template = assertions.Template.from_stack(stacks["network"])
+
+    # A public and a private subnet in each of the two zones
+    template.resource_count_is("AWS::EC2::Subnet", 4)
+    template.resource_count_is("AWS::EC2::NatGateway", 1)
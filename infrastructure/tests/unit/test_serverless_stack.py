@@ -0,0 +1,47 @@
+import aws_cdk.assertions as assertions
+
+def test_trigger_queues_have_visibility_timeouts_and_dead_letter_queue(stacks):
+    template = assertions.Template.from_stack(stacks["serverless"])
+    serverless_stack = stacks["serverless"]
+    dead_letter_queue_id = serverless_stack.get_logical_id(
+        serverless_stack.trigger_dead_letter_queue.node.default_child
+    )
+
+    # Three trigger queues plus the shared dead-letter queue
+    template.resource_count_is("AWS::SQS::Queue", 4)
+    template.has_resource_properties("AWS::SQS::Queue", {
+        "MessageRetentionPeriod": 14 * 24 * 60 * 60
+    })
+
+    # 6x the function timeouts, all redriving to the dead-letter queue after three receives
+    for visibility_timeout, count in [(6 * 60, 2), (30 * 60, 1)]:
+        queues = template.find_resources("AWS::SQS::Queue", {
+            "Properties": {
+                "VisibilityTimeout": visibility_timeout,
+                "RedrivePolicy": {
+                    "deadLetterTargetArn": {"Fn::GetAtt": [dead_letter_queue_id, "Arn"]},
+                    "maxReceiveCount": 3
+                }
+            }
+        })
+        assert len(queues) == count
+
+def test_trigger_functions_consume_queues_with_partial_batch_failures(stacks):
+    template = assertions.Template.from_stack(stacks["serverless"])
+
+    template.resource_count_is("AWS::Lambda::EventSourceMapping", 3)
+    mappings = template.find_resources("AWS::Lambda::EventSourceMapping", {
+        "Properties": {
+            "BatchSize": 10,
+            "MaximumBatchingWindowInSeconds": 5,
+            "FunctionResponseTypes": ["ReportBatchItemFailures"]
+        }
+    })
+    assert len(mappings) == 3
+
+    # SNS delivers the raw S3 event to each queue
+    template.resource_count_is("AWS::SNS::Subscription", 3)
+    template.all_resources_properties("AWS::SNS::Subscription", {
+        "Protocol": "sqs",
+        "RawMessageDelivery": True
+    })
@@ -11,8 +11,27 @@ aws ecr get-login-password --region $AWS_REGION | docker login --username AWS --
 # Build the Docker image for AMD64 (Fargate requires x86_64/amd64)
 docker build --platform linux/amd64 -t $ECR_REPO .
 
-# Tag the image
+# Tag the image, plus a release tag that the ECR lifecycle policy keeps so pinned digests stay pullable
+RELEASE_TAG=release-$(date -u +%Y%m%dT%H%M%S)
 docker tag $ECR_REPO:latest $AWS_ACCOUNT_ID.dkr.ecr.$AWS_REGION.amazonaws.com/$ECR_REPO:latest
+docker tag $ECR_REPO:latest $AWS_ACCOUNT_ID.dkr.ecr.$AWS_REGION.amazonaws.com/$ECR_REPO:$RELEASE_TAG
 
 # Push the image to ECR
 docker push $AWS_ACCOUNT_ID.dkr.ecr.$AWS_REGION.amazonaws.com/$ECR_REPO:latest
+docker push $AWS_ACCOUNT_ID.dkr.ecr.$AWS_REGION.amazonaws.com/$ECR_REPO:$RELEASE_TAG
+
+# Build and push a SOCI index so Fargate lazily loads the image instead of pulling it whole
+# Requires the soci CLI and containerd (ctr) on the build host
+IMAGE=$AWS_ACCOUNT_ID.dkr.ecr.$AWS_REGION.amazonaws.com/$ECR_REPO:latest
+if command -v soci > /dev/null && command -v ctr > /dev/null; then
+    ECR_PASSWORD=$(aws ecr get-login-password --region $AWS_REGION)
+    sudo ctr image pull --user AWS:$ECR_PASSWORD $IMAGE
+    sudo soci create $IMAGE
+    sudo soci push --user AWS:$ECR_PASSWORD $IMAGE
+else
+    echo "soci or ctr not found; skipping SOCI index (Fargate will pull the full image)"
+fi
+
+# Print the pushed digest to pin the job definition with
+# cdk deploy --context metadata_image_digest=<digest>
+docker inspect --format '{{index .RepoDigests 0}}' $AWS_ACCOUNT_ID.dkr.ecr.$AWS_REGION.amazonaws.com/$ECR_REPO:latest
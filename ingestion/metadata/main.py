@@ -43,7 +43,7 @@ def read_profiles_from_s3(profile_s3_key: str) -> list[str]:
 def upload_to_s3(df: pd.DataFrame, key: str):
     with tempfile.TemporaryDirectory() as temp_dir:
         temp_path = Path(temp_dir) / 'data.parquet'
-        df.to_parquet(temp_path)
+        df.to_parquet(temp_path, compression = "zstd")
         s3_client.upload_file(str(temp_path), CONFIG.s3_bucket, key)
 
 def check_last_processed_at(profile: str) -> datetime:
@@ -174,8 +174,8 @@ class VideoMetadata:
                 LOGGER.error(f"No valid metadata found for {profile}")
                 return None
 
-            # Create DataFrame
-            df = pd.DataFrame(video_data)
+            # Create DataFrame, written out in upload order so readers don't need to sort
+            df = pd.DataFrame(video_data).sort_values('upload_date', ignore_index=True)
             
             return df
 
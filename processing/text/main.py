@@ -83,7 +83,7 @@ def read_transcripts_from_s3(transcripts_s3_key: str) -> pd.DataFrame:
 def upload_to_s3(df: pd.DataFrame, key: str):
     with tempfile.TemporaryDirectory() as temp_dir:
         temp_path = Path(temp_dir) / 'data.parquet'
-        df.to_parquet(temp_path)
+        df.to_parquet(temp_path, compression = "zstd")
         CONFIG.s3_client.upload_file(str(temp_path), CONFIG.s3_bucket, key)
 
 class TextProcessor:
@@ -14,8 +14,15 @@ docker build --platform linux/amd64 \
     --no-cache \
     -t $ECR_REPO .
 
-# Tag the image
+# Tag the image, plus a release tag that the ECR lifecycle policy keeps so pinned digests stay pullable
+RELEASE_TAG=release-$(date -u +%Y%m%dT%H%M%S)
 docker tag $ECR_REPO:latest $AWS_ACCOUNT_ID.dkr.ecr.$AWS_REGION.amazonaws.com/$ECR_REPO:latest
+docker tag $ECR_REPO:latest $AWS_ACCOUNT_ID.dkr.ecr.$AWS_REGION.amazonaws.com/$ECR_REPO:$RELEASE_TAG
 
 # Push the image to ECR
 docker push $AWS_ACCOUNT_ID.dkr.ecr.$AWS_REGION.amazonaws.com/$ECR_REPO:latest
+docker push $AWS_ACCOUNT_ID.dkr.ecr.$AWS_REGION.amazonaws.com/$ECR_REPO:$RELEASE_TAG
+
+# Print the pushed digest to pin the job definition with
+# cdk deploy --context transcriber_image_digest=<digest>
+docker inspect --format '{{index .RepoDigests 0}}' $AWS_ACCOUNT_ID.dkr.ecr.$AWS_REGION.amazonaws.com/$ECR_REPO:latest
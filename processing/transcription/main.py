@@ -31,7 +31,8 @@ class Config:
         
         # Whisper Configuration
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.compute_type = "float16" if self.device == "cuda" else "float32"
+        # int8 weights with float16 activations: quantized CTranslate2 kernels on GPU
+        self.compute_type = "int8_float16" if self.device == "cuda" else "float32"
         self.model_name = "base.en"
         self.batch_size = 32
         
@@ -58,7 +59,7 @@ def read_metadata_from_s3(metadata_s3_key: str) -> List[Dict[str, Any]]:
 def upload_to_s3(df: pd.DataFrame, key: str):
     with tempfile.TemporaryDirectory() as temp_dir:
         temp_path = Path(temp_dir) / 'data.parquet'
-        df.to_parquet(temp_path)
+        df.to_parquet(temp_path, compression = "zstd")
         s3_client.upload_file(str(temp_path), CONFIG.s3_bucket, key)
 
 class Transcriber:
@@ -0,0 +1,90 @@
+import awswrangler as wr
+import logging
+from datetime import datetime, timezone
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+LOGGER = logging.getLogger(__name__)
+
+DATABASE = "tiktok_analytics"
+TABLE = "profile_stats"
+LOCATION = "s3://tiktoktrends/videos/profile_stats/"
+ATHENA_OUTPUT = "s3://tiktoktrends/athena-results/"
+
+# Per-profile aggregates read by the dashboard, tagged with the snapshot they belong to
+STATS_SQL = """
+    SELECT
+        profile,
+        COUNT(id) as videos_detected,
+        COALESCE(MAX(text_counts.videos_analyzed), 0) as videos_analyzed,
+
+        CAST(SUM(duration) as BIGINT) as total_duration,
+        CAST(SUM(view_count) as BIGINT) as total_views,
+        CAST(SUM(like_count) as BIGINT) as total_likes,
+        CAST(SUM(comment_count) as BIGINT) as total_comments,
+        CAST(SUM(repost_count) as BIGINT) as total_reposts,
+
+        CAST(AVG(duration) as DOUBLE) as average_duration,
+        CAST(AVG(view_count) as DOUBLE) as average_views,
+        CAST(AVG(like_count) as DOUBLE) as average_likes,
+        CAST(AVG(comment_count) as DOUBLE) as average_comments,
+        CAST(AVG(repost_count) as DOUBLE) as average_reposts,
+
+        CAST(MIN(duration) as BIGINT) as minimum_duration,
+        CAST(MIN(view_count) as BIGINT) as minimum_views,
+        CAST(MIN(like_count) as BIGINT) as minimum_likes,
+        CAST(MIN(comment_count) as BIGINT) as minimum_comments,
+        CAST(MIN(repost_count) as BIGINT) as minimum_reposts,
+
+        CAST(MAX(duration) as BIGINT) as maximum_duration,
+        CAST(MAX(view_count) as BIGINT) as maximum_views,
+        CAST(MAX(like_count) as BIGINT) as maximum_likes,
+        CAST(MAX(comment_count) as BIGINT) as maximum_comments,
+        CAST(MAX(repost_count) as BIGINT) as maximum_reposts,
+
+        '{snapshot_at}' as snapshot_at
+    FROM metadata
+    LEFT JOIN (
+        SELECT
+            profile,
+            COUNT(*) as videos_analyzed
+        FROM text_analysis
+        GROUP BY profile
+    ) text_counts USING (profile)
+    GROUP BY profile
+"""
+
+def build_profile_stats() -> str:
+    """
+    Write a new snapshot of per-profile stats into the profile_stats table
+    The table is created with CTAS on the first run and appended to afterwards
+    """
+    # Compact UTC timestamp: sorts chronologically and keeps colons out of the S3 partition path
+    snapshot_at = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+    select_sql = STATS_SQL.format(snapshot_at = snapshot_at)
+
+    if wr.catalog.does_table_exist(database = DATABASE, table = TABLE):
+        sql = f"INSERT INTO {TABLE} {select_sql}"
+    else:
+        sql = f"""
+            CREATE TABLE {TABLE}
+            WITH (
+                format = 'PARQUET',
+                write_compression = 'ZSTD',
+                external_location = '{LOCATION}',
+                partitioned_by = ARRAY['snapshot_at']
+            ) AS {select_sql}
+        """
+
+    wr.athena.start_query_execution(
+        sql = sql,
+        database = DATABASE,
+        s3_output = ATHENA_OUTPUT,
+        wait = True
+    )
+    LOGGER.info(f"Built profile stats snapshot: snapshot_at={snapshot_at}")
+
+    return snapshot_at
+
+if __name__ == "__main__":
+    build_profile_stats()
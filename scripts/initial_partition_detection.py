@@ -1,18 +1,48 @@
 import boto3
 import logging
+import os
+import random
 import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 LOGGER = logging.getLogger(__name__)
 
+# Polling delays for Athena queries (seconds)
+POLL_INITIAL_DELAY = float(os.environ.get("ATHENA_POLL_DELAY", 0.5))
+POLL_MAX_DELAY = 10
+
+# Queries per table submitted before waiting on them; both tables run at once, so the
+# account-wide count stays under Athena's default DDL concurrency of 20
+MAX_IN_FLIGHT = int(os.environ.get("ATHENA_MAX_IN_FLIGHT", 8))
+
+# Attempts for a throttled StartQueryExecution call before the partition counts as failed
+SUBMIT_ATTEMPTS = 5
+
+# Limits on polling a window of queries before its unfinished partitions count as failed:
+# overall wait (seconds) and BatchGetQueryExecution errors in a row
+WAIT_TIMEOUT = float(os.environ.get("ATHENA_WAIT_TIMEOUT", 600))
+MAX_CONSECUTIVE_POLL_ERRORS = 5
+
+# Shared by the concurrent table workers: back off on throttled calls instead of failing,
+# and keep enough pooled keep-alive connections that threads don't queue for one
+CLIENT_CONFIG = Config(
+    max_pool_connections = 32,
+    tcp_keepalive = True,
+    retries = {'max_attempts': 10, 'mode': 'adaptive'}
+)
+
 def list_partitions(bucket: str, prefix: str) -> list:
     """
     List all partitions in the given S3 prefix by looking for parquet files
     Returns list of tuples: (profile, processed_at, full_path)
     """
-    s3_client = boto3.client('s3')
+    s3_client = boto3.client('s3', config = CLIENT_CONFIG)
     partitions = []
     
     # Regex to extract partition values from path
@@ -34,14 +64,42 @@ def list_partitions(bucket: str, prefix: str) -> list:
     
     return partitions
 
-def add_partitions(database: str, table: str, partitions: list) -> None:
+def start_query(athena_client, query: str, database: str) -> str:
+    """
+    Start an Athena query, retrying with backoff while the account is throttled
+    Returns the query execution ID
+    """
+    for attempt in range(SUBMIT_ATTEMPTS):
+        try:
+            response = athena_client.start_query_execution(
+                QueryString=query,
+                QueryExecutionContext={'Database': database},
+                ResultConfiguration={
+                    'OutputLocation': 's3://tiktoktrends/athena-results/'
+                }
+            )
+            return response['QueryExecutionId']
+        except ClientError as e:
+            throttled = e.response['Error']['Code'] in ['TooManyRequestsException', 'ThrottlingException']
+            if not throttled or attempt == SUBMIT_ATTEMPTS - 1:
+                raise
+            time.sleep(min(POLL_INITIAL_DELAY * (2 ** attempt) + random.uniform(0, 0.5), POLL_MAX_DELAY))
+
+def add_partitions(database: str, table: str, partitions: list) -> int:
     """
     Add partitions to table using Athena
+    
+    ALTER TABLE statements are submitted in windows of MAX_IN_FLIGHT and each window is
+    polled together, so queries run concurrently without exceeding Athena's limits.
+    Returns the number of partitions that could not be added.
     """
-    athena_client = boto3.client('athena')
+    athena_client = boto3.client('athena', config = CLIENT_CONFIG)
+    failed = 0
     
-    for profile, processed_at, location in partitions:
-        try:
+    for i in range(0, len(partitions), MAX_IN_FLIGHT):
+        # Submit a window of queries without waiting on the previous one
+        query_executions = []
+        for profile, processed_at, location in partitions[i : i + MAX_IN_FLIGHT]:
             query = f"""
             ALTER TABLE {database}.{table}
             ADD IF NOT EXISTS PARTITION (
@@ -53,46 +111,106 @@ def add_partitions(database: str, table: str, partitions: list) -> None:
             
             LOGGER.info(f"Adding partition: profile={profile}, processed_at={processed_at}")
             
-            # Execute the query
-            response = athena_client.start_query_execution(
-                QueryString=query,
-                QueryExecutionContext={'Database': database},
-                ResultConfiguration={
-                    'OutputLocation': 's3://tiktoktrends/athena-results/'
-                }
-            )
+            try:
+                execution_id = start_query(athena_client, query, database)
+                query_executions.append((execution_id, profile, processed_at))
+            except Exception as e:
+                LOGGER.error(f"Error adding partition profile={profile}, processed_at={processed_at}: {str(e)}")
+                failed += 1
+        
+        failed += wait_for_queries(athena_client, query_executions)
+    
+    return failed
+
+def wait_for_queries(athena_client, query_executions: list) -> int:
+    """
+    Poll submitted queries until all of them finish, WAIT_TIMEOUT passes or polling keeps erroring
+    query_executions is a list of tuples: (query_execution_id, profile, processed_at)
+    Returns the number of queries that did not succeed (unfinished ones included)
+    """
+    pending = {execution_id: (profile, processed_at) for execution_id, profile, processed_at in query_executions}
+    failed = 0
+    
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    consecutive_errors = 0
+    attempt = 0
+    while pending:
+        if time.monotonic() > deadline or consecutive_errors >= MAX_CONSECUTIVE_POLL_ERRORS:
+            for profile, processed_at in pending.values():
+                LOGGER.error(f"Gave up waiting on partition profile={profile}, processed_at={processed_at}")
+            return failed + len(pending)
+        
+        # Exponential backoff with jitter to stay under the GetQueryExecution rate limit
+        delay = min(POLL_INITIAL_DELAY * (1.5 ** attempt) + random.uniform(0, 0.5), POLL_MAX_DELAY)
+        time.sleep(delay)
+        attempt += 1
+        
+        # BatchGetQueryExecution accepts at most 50 IDs per call
+        execution_ids = list(pending)
+        for i in range(0, len(execution_ids), 50):
+            try:
+                response = athena_client.batch_get_query_execution(
+                    QueryExecutionIds=execution_ids[i : i + 50]
+                )
+            except Exception as e:
+                LOGGER.error(f"Error checking partition queries: {str(e)}")
+                consecutive_errors += 1
+                continue
+            consecutive_errors = 0
             
-            # Wait for query to complete
-            query_execution_id = response['QueryExecutionId']
-            while True:
-                query_status = athena_client.get_query_execution(
-                    QueryExecutionId=query_execution_id
-                )['QueryExecution']['Status']['State']
-                
-                if query_status in ['SUCCEEDED', 'FAILED', 'CANCELLED']:
-                    break
-                    
-            if query_status != 'SUCCEEDED':
-                LOGGER.error(f"Failed to add partition: {query_status}")
+            # IDs Athena cannot look up will never finish
+            for unprocessed in response.get('UnprocessedQueryExecutionIds', []):
+                profile, processed_at = pending.pop(unprocessed['QueryExecutionId'])
+                LOGGER.error(
+                    f"Failed to add partition profile={profile}, processed_at={processed_at}: "
+                    f"{unprocessed.get('ErrorMessage', 'query not found')}"
+                )
+                failed += 1
+            
+            for execution in response['QueryExecutions']:
+                query_status = execution['Status']['State']
+                if query_status not in ['SUCCEEDED', 'FAILED', 'CANCELLED']:
+                    continue
                 
-        except Exception as e:
-            LOGGER.error(f"Error adding partition: {str(e)}")
+                profile, processed_at = pending.pop(execution['QueryExecutionId'])
+                if query_status != 'SUCCEEDED':
+                    LOGGER.error(
+                        f"Failed to add partition profile={profile}, processed_at={processed_at}: {query_status}"
+                    )
+                    failed += 1
+    
+    return failed
+
+def process_table(bucket: str, database: str, table: str, prefix: str) -> int:
+    """
+    Discover the partitions under a prefix and register them on the table
+    Returns the number of partitions that could not be added
+    """
+    LOGGER.info(f"Processing {table} table partitions...")
+    partitions = list_partitions(bucket, prefix)
+    LOGGER.info(f"Found {len(partitions)} {table} partitions")
+    return add_partitions(database, table, partitions)
 
 def main():
     BUCKET = "tiktoktrends"
     DATABASE = "tiktok_analytics"
+    TABLES = {
+        "metadata": "videos/metadata/",
+        "text_analysis": "videos/text/"
+    }
     
-    # Process metadata table
-    LOGGER.info("Processing metadata table partitions...")
-    metadata_partitions = list_partitions(BUCKET, "videos/metadata/")
-    LOGGER.info(f"Found {len(metadata_partitions)} metadata partitions")
-    add_partitions(DATABASE, "metadata", metadata_partitions)
+    # Tables are independent, so list and register them concurrently
+    with ThreadPoolExecutor(max_workers = len(TABLES)) as executor:
+        futures = [
+            executor.submit(process_table, BUCKET, DATABASE, table, prefix)
+            for table, prefix in TABLES.items()
+        ]
+        failed = sum(future.result() for future in futures)
     
-    # Process text analysis table
-    LOGGER.info("Processing text_analysis table partitions...")
-    text_partitions = list_partitions(BUCKET, "videos/text/")
-    LOGGER.info(f"Found {len(text_partitions)} text analysis partitions")
-    add_partitions(DATABASE, "text_analysis", text_partitions)
+    # Fail the run so skipped partitions are not mistaken for a complete backfill
+    if failed:
+        LOGGER.error(f"{failed} partitions could not be added")
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()